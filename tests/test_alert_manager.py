@@ -0,0 +1,110 @@
+import time
+import logging
+from vm_monitor.alert_manager import AlertManager, TokenBucket
+from vm_monitor.cpu_monitor import CPUMonitor
+from vm_monitor.ssh_monitor import SSHMonitor
+
+
+def test_repeated_alert_is_logged_once(caplog):
+    """
+    Tests that an open alert is only logged when it opens and when it resolves.
+    Asserts repeats are counted instead of logged.
+    """
+    alerts = AlertManager({})
+    with caplog.at_level(logging.INFO):
+        assert alerts.fire("cpu", "usage", "High CPU usage detected")
+        for _ in range(50):
+            assert not alerts.fire("cpu", "usage", "High CPU usage detected")
+        assert alerts.resolve("cpu", "usage", "CPU usage back below threshold")
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages.count("High CPU usage detected") == 1
+    assert any("seen 51 times" in message for message in messages)
+    assert not alerts.resolve("cpu", "usage")
+
+
+def test_digest_summarises_repeats(caplog):
+    """
+    Tests that the digest reports how often open alerts repeated and resets the counters.
+    """
+    alerts = AlertManager({"alerting": {"digest_interval": 3600}})
+    alerts.fire("disk", "/", "High disk usage")
+    alerts.fire("disk", "/", "High disk usage")
+    with caplog.at_level(logging.WARNING):
+        alerts.flush_digest()
+        alerts.flush_digest()
+    digests = [record.getMessage() for record in caplog.records if "Alert digest" in record.getMessage()]
+    assert digests == ["Alert digest: 1 open alerts; disk// x1 (last: High disk usage)"]
+
+
+def test_digest_names_alerts_opened_under_rate_limit(caplog):
+    """
+    Tests that an alert whose opening message was rate limited is named in the next digest, and only once.
+    """
+    alerts = AlertManager({"alerting": {"rate": 0, "burst": 1, "digest_interval": 3600}})
+    with caplog.at_level(logging.WARNING):
+        alerts.fire("ssh", "1.1.1.1", "Failed logins from 1.1.1.1")
+        alerts.fire("ssh", "2.2.2.2", "Failed logins from 2.2.2.2")
+        alerts.flush_digest()
+        alerts.flush_digest()
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == [
+        "Failed logins from 1.1.1.1",
+        "Alert digest: 2 open alerts; new ssh/2.2.2.2 x1 (last: Failed logins from 2.2.2.2); 1 messages dropped by rate limit",
+    ]
+
+
+def test_rate_limit_and_bounded_state():
+    """
+    Tests that the token bucket caps output and open alerts are capped in memory.
+    """
+    alerts = AlertManager({"alerting": {"rate": 0, "burst": 3, "max_open_alerts": 5}})
+    for i in range(10):
+        alerts.fire("ssh", f"10.0.0.{i}", f"Failed logins from 10.0.0.{i}")
+    assert len(alerts.open_alerts) == 5
+    assert alerts.overflow == 5
+    assert alerts.dropped == 2
+
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    assert bucket.consume(now=bucket.updated)
+    assert not bucket.consume(now=bucket.updated)
+    assert bucket.consume(now=bucket.updated + 1)
+
+
+def test_cpu_monitor_uses_shared_alerts(monkeypatch):
+    """
+    Tests that CPUMonitor opens and resolves its alert through the shared manager.
+    """
+    alerts = AlertManager({})
+    monitor = CPUMonitor({"cpu_threshold": 50}, alert_manager=alerts)
+    monkeypatch.setattr(monitor, 'get_usage', lambda interval=1: 95.0)
+    monitor.check_cpu_usage()
+    monitor.check_cpu_usage()
+    assert alerts.open_alerts[("cpu", "usage")].count == 2
+    monkeypatch.setattr(monitor, 'get_usage', lambda interval=1: 10.0)
+    monitor.check_cpu_usage()
+    assert not alerts.open_alerts
+
+
+def test_ssh_overflow_does_not_repeat_actions(tmp_path):
+    """
+    Tests that failures from IPs beyond max_open_alerts do not trigger actions on every line,
+    and that expired alerts make room for new incidents.
+    """
+    log_file = tmp_path / "auth.log"
+    log_file.write_text("")
+    config = {
+        "log_directory": str(tmp_path),
+        "alerting": {"max_open_alerts": 2},
+        "ssh_monitor": {"log_file": str(log_file), "source": "file", "check_interval": 1, "max_failures": 1},
+    }
+    monitor = SSHMonitor(config)
+    actions = []
+    monitor.take_action = actions.append
+    for ip in ["10.0.0.0", "10.0.0.1"] + ["10.0.0.2"] * 5:
+        monitor.process_line(f"sshd[1]: Failed password for root from {ip} port 22 ssh2")
+    assert actions == ["10.0.0.0", "10.0.0.1"]
+
+    assert monitor.alerts.expire(now=time.time() + monitor.alert_expiry) == 2
+    monitor.process_line("sshd[1]: Failed password for root from 10.0.0.2 port 22 ssh2")
+    monitor.process_line("sshd[1]: Failed password for root from 10.0.0.2 port 22 ssh2")
+    assert actions == ["10.0.0.0", "10.0.0.1", "10.0.0.2"]
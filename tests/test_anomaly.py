@@ -0,0 +1,128 @@
+import sys
+import subprocess
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vm_monitor.anomaly import AnomalyDetector, MetricHistory, create_detector
+from vm_monitor.alert_manager import AlertManager
+from vm_monitor.cpu_monitor import CPUMonitor
+
+SETTINGS = {"anomaly_detection": {"enabled": True, "window": 500, "min_samples": 30, "z_threshold": 4.0}}
+
+
+def test_history_wraps_in_order():
+    """
+    Tests that the ring buffer keeps the newest samples in chronological order after wrapping.
+    """
+    history = MetricHistory(5)
+    history.extend(np.arange(3), np.arange(3))
+    history.extend(np.arange(3, 8), np.arange(3, 8))
+    timestamps, values = history.arrays()
+    assert list(values) == [3, 4, 5, 6, 7]
+    assert list(timestamps) == [3, 4, 5, 6, 7]
+
+
+def test_spike_is_flagged_and_normal_sample_is_not():
+    """
+    Tests that a sample far from the EWMA baseline is reported and a typical one is not.
+    """
+    rng = np.random.default_rng(0)
+    detector = AnomalyDetector(SETTINGS, "CPU usage")
+    timestamps = 1_700_000_000 + np.arange(200) * 60.0
+    detector.observe_batch(timestamps, 20 + rng.normal(0, 1, 200))
+
+    assert detector.observe(20.5, timestamps[-1] + 60) == {}
+    anomalies = detector.observe(60.0, timestamps[-1] + 120)
+    assert "deviation" in anomalies
+    assert "standard deviations" in anomalies["deviation"]
+
+
+def test_seasonal_baseline_uses_hour_of_day():
+    """
+    Tests that a level normal at one hour of the day is anomalous at another.
+    """
+    detector = AnomalyDetector({"anomaly_detection": {"window": 2000, "ewma_alpha": 0.001}}, "CPU usage")
+    detector.utc_offset = 0
+    # Busy (80%) from 09:00 to 10:00 and idle (10%) otherwise, every 5 minutes over five days
+    timestamps = np.arange(0, 5 * 86400, 300, dtype=np.float64)
+    busy = (timestamps // 3600) % 24 == 9
+    values = np.where(busy, 80.0, 10.0) + np.random.default_rng(1).normal(0, 1, len(timestamps))
+    detector.observe_batch(timestamps, values)
+
+    day = 5 * 86400
+    assert "seasonal" not in detector.observe(80.0, day + 9 * 3600 + 60)
+    assert "seasonal" in detector.observe(80.0, day + 15 * 3600)
+
+
+def test_seasonal_baseline_outlives_the_window():
+    """
+    Tests that hour-of-day baselines keep every hour after the sample window has wrapped many times.
+    """
+    detector = AnomalyDetector({"anomaly_detection": {"window": 100}}, "CPU usage")
+    detector.utc_offset = 0
+    # One sample every 10 seconds for two days; the window only holds the last ~17 minutes
+    timestamps = np.arange(0, 2 * 86400, 10, dtype=np.float64)
+    values = np.where((timestamps // 3600) % 24 == 9, 80.0, 10.0) + np.random.default_rng(2).normal(0, 1, len(timestamps))
+    for start in range(0, len(timestamps), 500):
+        detector.observe_batch(timestamps[start:start + 500], values[start:start + 500])
+
+    assert detector.hour_counts[9] == 720 and detector.hour_means[9] == pytest.approx(80.0, abs=0.2)
+    day = 2 * 86400
+    assert "seasonal" not in detector.observe(80.0, day + 9 * 3600 + 60)
+    assert "seasonal" in detector.observe(80.0, day + 15 * 3600)
+
+
+def test_disk_fill_forecast():
+    """
+    Tests that steadily growing usage is forecast to fill within the horizon and flat usage is not.
+    """
+    config = {"anomaly_detection": {"forecast_horizon": 8 * 3600}}
+    growing = AnomalyDetector(config, "Disk usage of /", forecast=True)
+    timestamps = np.arange(100) * 60.0
+    # 1% per 10 minutes from 50%: full about 6.7 hours after the last sample
+    growing.observe_batch(timestamps, 50 + timestamps / 600)
+    assert growing.seconds_until_full() == pytest.approx((100 - (50 + timestamps[-1] / 600)) * 600)
+    assert "forecast" in growing.observe(50 + (timestamps[-1] + 60) / 600, timestamps[-1] + 60)
+
+    flat = AnomalyDetector(config, "Disk usage of /", forecast=True)
+    flat.observe_batch(timestamps, np.full(100, 50.0))
+    assert flat.seconds_until_full() is None
+
+
+def test_monitor_reports_anomalies_through_alert_manager():
+    """
+    Tests that the CPU monitor raises and clears anomaly alerts, and that detection is off by default.
+    """
+    assert create_detector({}, "CPU usage") is None
+
+    alerts = AlertManager({})
+    monitor = CPUMonitor(SETTINGS, alert_manager=alerts)
+    monitor.detector.observe_batch(np.arange(100) * 60.0, np.full(100, 20.0) + np.tile([0.0, 1.0], 50))
+
+    monitor.get_usage = lambda interval=1: 70.0
+    monitor.run_check()
+    assert ("cpu", "usage:deviation") in alerts.open_alerts
+
+    monitor.get_usage = lambda interval=1: 20.0
+    monitor.run_check()
+    assert ("cpu", "usage:deviation") not in alerts.open_alerts
+
+
+def test_constant_history_ignores_small_changes():
+    """
+    Tests that after a flat history a small change is not reported, while a large one still is.
+    """
+    detector = AnomalyDetector({"anomaly_detection": {"min_std": 0.5}}, "Disk usage of /")
+    detector.observe_batch(np.arange(100) * 60.0, np.full(100, 50.0))
+    assert detector.observe(50.1, 6000.0) == {}
+    assert "deviation" in detector.observe(55.0, 6060.0)
+
+
+def test_numpy_is_not_imported_when_detection_is_disabled():
+    """
+    Tests that importing and constructing a resource monitor with default settings leaves numpy unloaded.
+    """
+    code = "import sys; from vm_monitor.cpu_monitor import CPUMonitor; CPUMonitor({}); print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,165 @@
+import os
+import sys
+import random
+import hashlib
+import pytest
+from vm_monitor.chunk_hasher import GEAR, MASK_64, cdc_boundaries, chunk_file, first_changed_chunk, changed_ranges
+from vm_monitor.file_monitor import FileIntegrityMonitor
+
+
+def make_entry(path, settings):
+    chunks, file_hash = chunk_file(path, settings)
+    size = chunks[-1][0] + chunks[-1][1] if chunks else 0
+    return {"size": size, "mode": settings["mode"], "algorithm": settings["algorithm"], "sha256": file_hash, "chunks": chunks}
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(random.Random(1).randbytes(256 * 1024))
+    return path
+
+
+@pytest.mark.parametrize("algorithm", ["sha256", "blake2b", "xxhash"])
+def test_chunk_file_matches_full_hash(data_file, algorithm):
+    """
+    Tests that chunking covers the whole file and still yields the whole-file SHA-256.
+    """
+    entry = make_entry(str(data_file), {"mode": "fixed", "chunk_size": 4096, "algorithm": algorithm})
+    assert entry["sha256"] == hashlib.sha256(data_file.read_bytes()).hexdigest()
+    assert entry["size"] == 256 * 1024
+    assert first_changed_chunk(str(data_file), entry) is None
+
+
+def test_fixed_chunks_report_modified_range(data_file):
+    """
+    Tests that a one-byte change is located to its chunk and verification stops there.
+    """
+    settings = {"mode": "fixed", "chunk_size": 4096, "algorithm": "blake2b"}
+    old = make_entry(str(data_file), settings)
+    with open(data_file, "r+b") as f:
+        f.seek(10000)
+        f.write(b"\xff" if f.read(1) != b"\xff" else b"\x00")
+
+    assert first_changed_chunk(str(data_file), old) == 2
+    assert changed_ranges(old, make_entry(str(data_file), settings)) == [(8192, 12288)]
+
+
+def test_cdc_chunks_ignore_shifted_data(data_file):
+    """
+    Tests that content-defined chunks only report the region around an insertion, not everything after it.
+    """
+    settings = {"mode": "cdc", "chunk_size": 4096, "algorithm": "blake2b"}
+    old = make_entry(str(data_file), settings)
+    content = data_file.read_bytes()
+    data_file.write_bytes(content[:50000] + b"inserted" + content[50000:])
+
+    ranges = changed_ranges(old, make_entry(str(data_file), settings))
+    assert len(ranges) == 1
+    start, end = ranges[0]
+    assert start <= 50000 < end
+    assert end - start < 64 * 1024
+
+
+@pytest.mark.parametrize("min_size, avg_size, max_size", [(0, 64, 256), (1024, 4096, 16384), (100, 256, 300)])
+def test_vectorised_cdc_matches_rolling_hash(min_size, avg_size, max_size, monkeypatch):
+    """
+    Tests that the NumPy chunker, and the pure-Python one used without NumPy,
+    cut exactly where hashing each chunk byte by byte does.
+    """
+    pytest.importorskip("numpy")
+    rng = random.Random(2)
+    # Random data, and a low-entropy stretch where the window hash repeats
+    data = rng.randbytes(100_000) + bytes(rng.choice(b"ab") for _ in range(20_000))
+
+    mask = (1 << max(1, avg_size.bit_length() - 1)) - 1
+    mask <<= 64 - mask.bit_length()
+    expected = []
+    start = 0
+    while start < len(data):
+        end = min(start + max_size, len(data))
+        cut = end
+        rolling = 0
+        for position in range(start + min_size, end if end - start > min_size else start):
+            rolling = ((rolling << 1) + GEAR[data[position]]) & MASK_64
+            if not rolling & mask:
+                cut = position + 1
+                break
+        expected.append((start, cut - start))
+        start = cut
+
+    assert list(cdc_boundaries(data, min_size, avg_size, max_size)) == expected
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    assert list(cdc_boundaries(data, min_size, avg_size, max_size)) == expected
+
+
+def test_file_monitor_chunked_mode(tmp_path, data_file, caplog):
+    """
+    Tests that FileIntegrityMonitor in chunked mode reports the changed byte ranges of a modified file.
+    """
+    config = {
+        "log_directory": str(tmp_path / "logs"),
+        "file_monitor": {
+            "snapshot_file": "file_snapshot.txt",
+            "monitored_files": [str(data_file)],
+            "check_interval": 60,
+            "chunking": {"mode": "fixed", "chunk_size": 4096, "algorithm": "blake2b"},
+        },
+    }
+    monitor = FileIntegrityMonitor(config)
+    assert os.path.exists(monitor.chunk_index_file)
+
+    with open(data_file, "r+b") as f:
+        f.seek(4096)
+        f.write(b"changed")
+    monitor.compare_files()
+    assert f"File modified: {data_file} (changed byte ranges: 4096-8191)" in caplog.text
+
+    caplog.clear()
+    FileIntegrityMonitor(config).compare_files()
+    assert "File modified" not in caplog.text
+
+
+def test_non_cryptographic_chunks_are_confirmed_with_sha256(tmp_path, data_file, monkeypatch):
+    """
+    Tests that matching xxhash chunk digests do not hide a modification from the SHA-256 check.
+    """
+    config = {
+        "log_directory": str(tmp_path / "logs"),
+        "file_monitor": {
+            "snapshot_file": "file_snapshot.txt",
+            "monitored_files": [str(data_file)],
+            "check_interval": 60,
+            "chunking": {"mode": "fixed", "chunk_size": 4096, "algorithm": "xxhash"},
+        },
+    }
+    monitor = FileIntegrityMonitor(config)
+    with open(data_file, "r+b") as f:
+        f.write(b"forged")
+    # Simulate a same-size modification that collides on every chunk digest
+    monkeypatch.setattr("vm_monitor.file_monitor.first_changed_chunk", lambda filepath, entry: None)
+    monkeypatch.setattr("vm_monitor.file_monitor.is_cryptographic", lambda algorithm: False)
+    assert monitor.hash_file(str(data_file)) == hashlib.sha256(data_file.read_bytes()).hexdigest()
+
+
+def test_non_cryptographic_chunks_read_the_file_once(tmp_path, data_file, monkeypatch):
+    """
+    Tests that with xxhash chunk digests the file is re-chunked directly, without a verification pass first.
+    """
+    config = {
+        "log_directory": str(tmp_path / "logs"),
+        "file_monitor": {
+            "snapshot_file": "file_snapshot.txt",
+            "monitored_files": [str(data_file)],
+            "check_interval": 60,
+            "chunking": {"mode": "fixed", "chunk_size": 4096, "algorithm": "xxhash"},
+        },
+    }
+    monitor = FileIntegrityMonitor(config)
+
+    def verify(filepath, entry):
+        raise AssertionError("verification pass should be skipped")
+
+    monkeypatch.setattr("vm_monitor.file_monitor.first_changed_chunk", verify)
+    monkeypatch.setattr("vm_monitor.file_monitor.is_cryptographic", lambda algorithm: False)
+    assert monitor.hash_file(str(data_file)) == hashlib.sha256(data_file.read_bytes()).hexdigest()
@@ -0,0 +1,123 @@
+import os
+import time
+import asyncio
+import pytest
+from vm_monitor.collector import RemoteCollector
+from vm_monitor.transport import FakeHostTransport, SSHConnectionPool, SSHTransport, SubprocessTransport
+
+PASSWD = "root:x:0:0:root:/root:/bin/bash\n"
+RULES = "*filter\n:INPUT ACCEPT [0:0]\n-A INPUT -p tcp --dport 22 -j ACCEPT\nCOMMIT\n"
+
+
+def make_host(name):
+    return FakeHostTransport(name, {
+        ("iptables-save",): RULES,
+        ("getent", "passwd"): PASSWD,
+        ("systemctl", "list-units", "--type=service", "--state=running"): "sshd.service loaded active running OpenSSH\n",
+        ("sha256sum", "--", "/etc/hosts"): "abc123  /etc/hosts\n",
+    })
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {
+        "log_directory": str(tmp_path),
+        "service_monitor": {"whitelist_file": "service_whitelist.txt", "check_interval": 60},
+        "iptables_monitor": {"snapshot_file": "iptables_snapshot.txt", "check_interval": 60},
+        "users_monitor": {"snapshot_file": "users_snapshot.txt", "check_interval": 60},
+        "file_monitor": {"snapshot_file": "file_snapshot.txt", "monitored_files": ["/etc/hosts"], "check_interval": 60},
+        "collector": {"hosts": [f"vm{i}" for i in range(20)], "max_concurrency": 8},
+    }
+
+
+def test_collector_sweeps_all_fake_hosts(config, tmp_path):
+    """
+    Tests that one sweep runs every check against every host through its transport.
+    Asserts each host gets its own snapshot directory populated from its own command output.
+    """
+    hosts = {}
+    collector = RemoteCollector(config, transport_factory=lambda host: hosts.setdefault(host, make_host(host)))
+    assert asyncio.run(collector.sweep()) == 20
+    assert (tmp_path / "hosts" / "vm7" / "users_snapshot.txt").read_text() == PASSWD
+    assert (tmp_path / "hosts" / "vm7" / "file_snapshot.txt").read_text() == "/etc/hosts,abc123\n"
+    assert ("iptables-save",) in hosts["vm0"].commands
+
+
+def test_remote_findings_name_their_host(config, caplog):
+    """
+    Tests that messages logged by a remote check are prefixed with the host they concern.
+    """
+    hosts = {}
+    config["collector"].update(hosts=["vm0", "vm1"], checks=["services"])
+    collector = RemoteCollector(config, transport_factory=lambda host: hosts.setdefault(host, make_host(host)))
+    hosts["vm1"] = make_host("vm1")
+    hosts["vm1"].responses[("systemctl", "list-units", "--type=service", "--state=running")] = "cryptominer.service loaded active running\n"
+    with caplog.at_level("WARNING"):
+        asyncio.run(collector.sweep())
+    assert "[vm1] New service detected: cryptominer.service" in caplog.messages
+    assert not any(message.startswith("[vm0] New service detected: cryptominer") for message in caplog.messages)
+
+
+def test_collector_isolates_failing_host(config):
+    """
+    Tests that an unreachable host does not stop the sweep of the others.
+    """
+    def unreachable():
+        raise ConnectionError("unreachable")
+
+    def factory(host):
+        transport = make_host(host)
+        if host == "vm3":
+            transport.connect = unreachable
+        return transport
+
+    collector = RemoteCollector(config, transport_factory=factory)
+    assert asyncio.run(collector.sweep()) == 19
+
+
+def test_hung_commands_are_killed_without_starving_other_hosts(config):
+    """
+    Tests that a command exceeding command_timeout is killed and its slot goes to the next host,
+    and that hosts whose commands all timed out are not counted as checked.
+    """
+    class HangingTransport(SubprocessTransport):
+        host = "hung"
+
+        def build_command(self, argv):
+            return ["sleep", "30"]
+
+    config["collector"].update(hosts=["hung0", "hung1", "vm0"], max_concurrency=2, command_timeout=0.5, checks=["iptables"])
+    hosts = {}
+    collector = RemoteCollector(
+        config, transport_factory=lambda host: hosts.setdefault(host, make_host(host) if host == "vm0" else HangingTransport())
+    )
+    started = time.monotonic()
+    assert asyncio.run(collector.sweep()) == 1
+    assert time.monotonic() - started < 10
+    assert ("iptables-save",) in hosts["vm0"].commands
+
+
+def test_ssh_transport_multiplexes_and_quotes():
+    """
+    Tests that SSH commands share a ControlPath socket and are quoted for the remote shell.
+    """
+    transport = SSHTransport("db1", user="monitor", control_dir="/run/vm-monitor")
+    command = transport.build_command(["sha256sum", "--", "/etc/my file"])
+    assert "ControlMaster=auto" in command
+    assert "ControlPath=/run/vm-monitor/vm-monitor-%C" in command
+    assert command[-3:] == ["db1", "--", "sha256sum -- '/etc/my file'"]
+
+
+def test_pool_creates_and_removes_its_socket_directory(monkeypatch):
+    """
+    Tests that the pool only creates a private ControlPath directory once a host is used and removes it on close.
+    """
+    monkeypatch.setattr("vm_monitor.transport.SSHTransport.close", lambda self: None)
+    pool = SSHConnectionPool({})
+    assert pool.control_dir is None
+
+    control_dir = pool.get("db1").control_path.rsplit("/", 1)[0]
+    assert pool.get({"host": "db2"}).control_path.startswith(control_dir)
+    assert os.path.isdir(control_dir)
+    pool.close_all()
+    assert not os.path.exists(control_dir)
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import pytest
+from vm_monitor.journal_source import JournalAuthSource
+from vm_monitor.ssh_monitor import SSHMonitor
+
+ENTRIES = [
+    {"__CURSOR": "s=1;i=1", "_SYSTEMD_UNIT": "sshd.service", "MESSAGE": "Accepted publickey for admin from 10.0.0.1 port 5000 ssh2"},
+    {"__CURSOR": "s=1;i=2", "_SYSTEMD_UNIT": "sshd.service", "MESSAGE": "Failed password for root from 10.0.0.9 port 5001 ssh2"},
+    {"__CURSOR": "s=1;i=3", "_SYSTEMD_UNIT": "sshd.service", "MESSAGE": list(b"Failed password for bob from 10.0.0.9 port 5002 ssh2")},
+]
+
+
+@pytest.fixture
+def fake_journalctl(tmp_path):
+    """
+    A journalctl stand-in that records its arguments and prints the entries after the requested cursor
+    in journalctl's compact JSON format.
+    """
+    script = tmp_path / "journalctl"
+    args_file = tmp_path / "args.json"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import json, sys, time\n"
+        f"json.dump(sys.argv[1:], open({str(args_file)!r}, 'w'))\n"
+        f"entries = {json.dumps(ENTRIES)!r}\n"
+        "entries = json.loads(entries)\n"
+        "after = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--after-cursor=')), None)\n"
+        "if after and after not in [e['__CURSOR'] for e in entries]:\n"
+        "    sys.exit('Failed to seek to cursor: Invalid argument')\n"
+        "if after:\n"
+        "    entries = entries[[e['__CURSOR'] for e in entries].index(after) + 1:]\n"
+        "for entry in entries:\n"
+        "    print(json.dumps(entry, separators=(',', ':')), flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    script.chmod(0o755)
+    return script, args_file
+
+
+def read_until(source, count, timeout=5.0):
+    messages = []
+    deadline = time.monotonic() + timeout
+    while len(messages) < count and time.monotonic() < deadline:
+        messages += source.read_messages()
+        time.sleep(0.05)
+    return messages
+
+
+def test_journal_source_filters_and_persists_cursor(tmp_path, fake_journalctl):
+    """
+    Tests that journal entries are filtered by unit in journalctl, prefiltered before JSON decoding,
+    and that the cursor of the newest entry is persisted.
+    """
+    script, args_file = fake_journalctl
+    cursor_file = str(tmp_path / "cursor.txt")
+    source = JournalAuthSource(cursor_file, prefilter=(b"Failed password",), journalctl=str(script))
+    try:
+        messages = read_until(source, 2)
+    finally:
+        source.close()
+
+    assert messages == [
+        "Failed password for root from 10.0.0.9 port 5001 ssh2",
+        "Failed password for bob from 10.0.0.9 port 5002 ssh2",
+    ]
+    args = json.load(open(args_file))
+    assert "--lines=0" in args
+    assert "_SYSTEMD_UNIT=sshd.service" in args
+    assert open(cursor_file).read() == "s=1;i=3"
+
+
+def test_journal_source_resumes_after_cursor(tmp_path, fake_journalctl):
+    """
+    Tests that a restarted source resumes after the saved cursor instead of replaying entries.
+    """
+    script, args_file = fake_journalctl
+    cursor_file = tmp_path / "cursor.txt"
+    cursor_file.write_text("s=1;i=2")
+    source = JournalAuthSource(str(cursor_file), journalctl=str(script))
+    try:
+        messages = read_until(source, 1)
+    finally:
+        source.close()
+
+    assert messages == ["Failed password for bob from 10.0.0.9 port 5002 ssh2"]
+    assert "--after-cursor=s=1;i=2" in json.load(open(args_file))
+
+
+def test_journal_source_discards_unusable_cursor(tmp_path, fake_journalctl, caplog):
+    """
+    Tests that a cursor journalctl cannot seek to is dropped after the first failure
+    and the source follows from the end of the journal, logging journalctl's error.
+    """
+    script, args_file = fake_journalctl
+    cursor_file = tmp_path / "cursor.txt"
+    cursor_file.write_text("s=0;i=bogus")
+    source = JournalAuthSource(str(cursor_file), journalctl=str(script))
+    try:
+        messages = read_until(source, 3)
+    finally:
+        source.close()
+
+    assert len(messages) == 3
+    assert "--lines=0" in json.load(open(args_file))
+    assert "Failed to seek to cursor: Invalid argument" in caplog.text
+    assert cursor_file.read_text() == "s=1;i=3"
+
+
+def test_ssh_log_tail_survives_rotation(tmp_path):
+    """
+    Tests that lines written just before a rename rotation are read, and that a copytruncate rotation is followed.
+    """
+    log_file = tmp_path / "auth.log"
+    log_file.write_text("")
+    config = {
+        "log_directory": str(tmp_path),
+        "ssh_monitor": {"log_file": str(log_file), "source": "file", "check_interval": 1, "max_failures": 100},
+    }
+    monitor = SSHMonitor(config)
+    monitor.run_check()
+    failure = "sshd[1]: Failed password for root from {} port 22 ssh2\n"
+
+    with open(log_file, "a") as f:
+        f.write(failure.format("10.0.0.1"))
+    os.rename(log_file, tmp_path / "auth.log.1")
+    log_file.write_text(failure.format("10.0.0.2"))
+    monitor.run_check()
+    assert dict(monitor.failures) == {"10.0.0.1": 1, "10.0.0.2": 1}
+
+    with open(log_file, "a") as f:
+        f.write(failure.format("10.0.0.2") * 3)
+    monitor.run_check()
+    # copytruncate: same inode, truncated below the read offset
+    log_file.write_text(failure.format("10.0.0.3"))
+    monitor.run_check()
+    assert dict(monitor.failures) == {"10.0.0.1": 1, "10.0.0.2": 4, "10.0.0.3": 1}
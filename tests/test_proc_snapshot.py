@@ -0,0 +1,96 @@
+import os
+import pytest
+from vm_monitor.proc_snapshot import ProcSnapshotCollector
+from vm_monitor.cpu_monitor import CPUMonitor
+from vm_monitor.memory_monitor import MemoryMonitor
+
+
+def write_proc(proc_root, cpu_line):
+    os.makedirs(os.path.join(proc_root, 'self'), exist_ok=True)
+    with open(os.path.join(proc_root, 'stat'), 'w') as f:
+        f.write(f"{cpu_line}\ncpu0 1 2 3 4 5 6 7 8 0 0\nintr 1\n")
+    with open(os.path.join(proc_root, 'meminfo'), 'w') as f:
+        f.write("MemTotal:       1000 kB\nMemFree:         100 kB\nMemAvailable:    250 kB\n")
+    with open(os.path.join(proc_root, 'diskstats'), 'w') as f:
+        f.write("   8       0 sda 10 0 80 5 20 0 160 9 0 12 14 0 0 0 0\n")
+    with open(os.path.join(proc_root, 'loadavg'), 'w') as f:
+        f.write("0.50 0.25 0.10 1/100 1234\n")
+    with open(os.path.join(proc_root, 'self', 'mounts'), 'w') as f:
+        f.write("/dev/sda1 / ext4 rw,relatime 0 0\n")
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    root = str(tmp_path / 'proc')
+    write_proc(root, "cpu  100 0 100 800 0 0 0 0 0 0")
+    return root
+
+
+def test_snapshot_parses_proc_files(proc_root):
+    """
+    Tests that a single collection parses every /proc source.
+    Asserts memory, load average, disk I/O and mounts are populated and CPU is unknown on the first tick.
+    """
+    collector = ProcSnapshotCollector({"disk_paths": ["/"]}, proc_root=proc_root)
+    snapshot = collector.collect()
+    assert snapshot.cpu_percent is None
+    assert snapshot.memory_percent == 75.0
+    assert snapshot.load_average == (0.5, 0.25, 0.1)
+    assert snapshot.disk_io["sda"].write_sectors == 160
+    assert snapshot.mounts == (("/dev/sda1", "/", "ext4"),)
+    assert 0 <= snapshot.disk_usage["/"] <= 100
+    collector.close()
+
+
+def test_snapshot_cpu_percent_uses_tick_delta(proc_root):
+    """
+    Tests that CPU usage is computed from the delta between two ticks.
+    Simulates 100 busy and 100 idle jiffies between ticks and expects 50%.
+    """
+    collector = ProcSnapshotCollector({}, proc_root=proc_root)
+    collector.collect()
+    write_proc(proc_root, "cpu  150 0 150 900 0 0 0 0 0 0")
+    assert collector.collect().cpu_percent == 50.0
+    collector.close()
+
+
+def test_snapshot_is_immutable(proc_root):
+    """
+    Tests that published snapshots cannot be modified by consumers.
+    """
+    collector = ProcSnapshotCollector({}, proc_root=proc_root)
+    snapshot = collector.collect()
+    with pytest.raises(Exception):
+        snapshot.memory_percent = 1.0
+    with pytest.raises(TypeError):
+        snapshot.disk_usage["/"] = 1.0
+    collector.close()
+
+
+def test_resource_monitors_share_snapshot(proc_root):
+    """
+    Tests that CPU and memory monitors read from the shared collector instead of psutil.
+    """
+    collector = ProcSnapshotCollector({}, proc_root=proc_root)
+    collector.collect()
+    write_proc(proc_root, "cpu  150 0 150 900 0 0 0 0 0 0")
+    collector.collect()
+    assert CPUMonitor({}, snapshot_source=collector).get_usage() == 50.0
+    assert MemoryMonitor({}, snapshot_source=collector).get_usage() == 75.0
+    collector.close()
+
+
+def test_stale_snapshot_falls_back_to_psutil(proc_root, monkeypatch):
+    """
+    Tests that a snapshot older than two collection intervals is ignored and psutil is used instead.
+    """
+    collector = ProcSnapshotCollector({"snapshot_interval": 10}, proc_root=proc_root)
+    snapshot = collector.collect()
+    assert collector.fresh(now=snapshot.timestamp + 20) is snapshot
+    assert collector.fresh(now=snapshot.timestamp + 21) is None
+
+    monitor = MemoryMonitor({}, snapshot_source=collector)
+    monkeypatch.setattr("vm_monitor.memory_monitor.psutil.virtual_memory", lambda: type("Memory", (), {"percent": 12.5}))
+    monkeypatch.setattr("vm_monitor.proc_snapshot.time.time", lambda: snapshot.timestamp + 60)
+    assert monitor.get_usage() == 12.5
+    collector.close()
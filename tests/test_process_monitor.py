@@ -0,0 +1,105 @@
+import os
+import shutil
+import pytest
+from vm_monitor.process_monitor import ProcessMonitor
+
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+
+
+def add_process(proc_root, pid, name, starttime):
+    path = os.path.join(proc_root, str(pid))
+    os.makedirs(path, exist_ok=True)
+    fields = ["S", "1"] + ["0"] * 17 + [str(starttime)] + ["0"] * 10
+    with open(os.path.join(path, 'stat'), 'w') as f:
+        f.write(f"{pid} ({name}) {' '.join(fields)}\n")
+    with open(os.path.join(path, 'cmdline'), 'wb') as f:
+        f.write(name.encode() + b"\0--flag\0")
+
+
+def write_tcp(proc_root, lines):
+    os.makedirs(os.path.join(proc_root, 'net'), exist_ok=True)
+    with open(os.path.join(proc_root, 'net', 'tcp'), 'w') as f:
+        f.write(TCP_HEADER + "".join(lines))
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    root = str(tmp_path / 'proc')
+    add_process(root, 1, "init", 10)
+    add_process(root, 200, "sshd", 20)
+    # 0100007F:0016 is 127.0.0.1:22 in LISTEN state
+    write_tcp(root, ["   0: 0100007F:0016 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1\n"])
+    return root
+
+
+@pytest.fixture
+def monitor(tmp_path, proc_root):
+    config = {
+        "log_directory": str(tmp_path / 'logs'),
+        "process_monitor": {"snapshot_file": "listeners.txt", "check_interval": 1},
+    }
+    return ProcessMonitor(config, proc_root=proc_root)
+
+
+def test_scan_detects_new_and_reused_pids(monitor, proc_root):
+    """
+    Tests that process sets are diffed by (pid, starttime).
+    A brand new PID and a PID reused with a different start time are both reported as started.
+    """
+    monitor.scan_processes()
+    add_process(proc_root, 300, "nc (evil)", 30)
+    # Build the replacement before removing the old directory so it gets a fresh inode, as procfs does
+    add_process(proc_root, 'new', "bash", 40)
+    shutil.rmtree(os.path.join(proc_root, '200'))
+    os.rename(os.path.join(proc_root, 'new'), os.path.join(proc_root, '200'))
+
+    started, exited = monitor.scan_processes()
+    assert sorted(started) == [(200, 40, "bash"), (300, 30, "nc (evil)")]
+    assert exited == [(200, 20, "sshd")]
+
+
+def test_scan_skips_unchanged_processes(monitor, proc_root, monkeypatch):
+    """
+    Tests that processes seen in the previous scan are not re-parsed.
+    """
+    monitor.scan_processes()
+    calls = []
+    original = monitor.read_process_stat
+    monkeypatch.setattr(monitor, 'read_process_stat', lambda pid: calls.append(pid) or original(pid))
+    add_process(proc_root, 300, "new", 30)
+    monitor.scan_processes()
+    assert calls == [300]
+
+
+def test_listening_socket_changes(monitor, proc_root):
+    """
+    Tests that listening sockets are compared against the saved baseline.
+    """
+    assert monitor.listening_sockets == {("tcp", "127.0.0.1", 22)}
+    assert not monitor.compare_listening_sockets()
+
+    write_tcp(proc_root, [
+        "   0: 0100007F:0016 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1\n",
+        "   1: 00000000:115C 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 2\n",
+        "   2: 0100007F:0016 0100007F:9C40 01 00000000:00000000 00:00000000 00000000     0        0 3\n",
+    ])
+    assert monitor.compare_listening_sockets()
+    assert ("tcp", "0.0.0.0", 4444) in monitor.load_listening_snapshot()
+
+
+def test_exec_event_overflow_triggers_rescan(monitor, proc_root):
+    """
+    Tests that events parsed before an overflow are reported and the rescan reports only the missed processes.
+    """
+    class OverflowingConnector:
+        def read_exec_events(self):
+            return [300], True
+
+    monitor.check_processes()
+    add_process(proc_root, 300, "curl", 30)
+    add_process(proc_root, 400, "nc", 40)
+    reported = []
+    monitor.report_process = lambda pid, comm: reported.append((pid, comm))
+
+    monitor.check_exec_events(OverflowingConnector())
+    assert reported == [(300, "curl"), (400, "nc")]
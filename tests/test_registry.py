@@ -0,0 +1,69 @@
+import sys
+import pytest
+from vm_monitor.registry import MonitorRegistry
+
+PLUGIN_SOURCE = '''
+class HeartbeatMonitor:
+    def __init__(self, config, alert_manager=None):
+        self.config = config
+        self.alert_manager = alert_manager
+        self.checks = 0
+
+    def run_check(self):
+        self.checks += 1
+
+
+class BrokenMonitor:
+    def __init__(self, config):
+        raise FileNotFoundError("/var/log/auth.log not found.")
+'''
+
+
+@pytest.fixture
+def plugin_module(tmp_path, monkeypatch):
+    (tmp_path / "heartbeat_plugin.py").write_text(PLUGIN_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "heartbeat_plugin"
+    sys.modules.pop("heartbeat_plugin", None)
+
+
+def make_config(enabled, plugin_module):
+    return {
+        "monitors": {
+            "enabled": enabled,
+            "plugins": {
+                "heartbeat": f"{plugin_module}:HeartbeatMonitor",
+                "broken": f"{plugin_module}:BrokenMonitor",
+            },
+        }
+    }
+
+
+def test_registry_constructs_plugin_with_requested_services(plugin_module):
+    """
+    Tests that a configured plugin is constructed with only the shared services it accepts.
+    """
+    created = []
+    services = {
+        "alert_manager": lambda: created.append("alert_manager") or "alerts",
+        "snapshot_source": lambda: created.append("snapshot_source") or "snapshots",
+    }
+    monitors = MonitorRegistry(make_config(["heartbeat"], plugin_module)).create_enabled(services)
+    assert monitors["heartbeat"].alert_manager == "alerts"
+    assert created == ["alert_manager"]
+
+
+def test_registry_isolates_failing_monitors(plugin_module):
+    """
+    Tests that a monitor failing to initialise, or an unknown one, does not stop the others.
+    """
+    registry = MonitorRegistry(make_config(["broken", "missing", "heartbeat"], plugin_module))
+    assert list(registry.create_enabled({})) == ["heartbeat"]
+
+
+def test_registry_imports_only_enabled_monitors(plugin_module):
+    """
+    Tests that disabled monitors are never imported.
+    """
+    MonitorRegistry(make_config([], plugin_module)).create_enabled({})
+    assert plugin_module not in sys.modules
@@ -0,0 +1,170 @@
+import os
+import time
+import pytest
+from vm_monitor.snapshot_archive import SnapshotArchive, open_archive
+from vm_monitor.iptables_monitor import IptablesMonitor
+from vm_monitor.transport import FakeHostTransport
+
+
+def ruleset(version: int) -> str:
+    rules = [f"-A INPUT -s 10.0.{n // 256}.{n % 256}/32 -p tcp --dport 22 -j ACCEPT\n" for n in range(1000)]
+    rules[version % 1000] = f"-A INPUT -s 192.168.1.{version % 256}/32 -j DROP\n"
+    return "*filter\n" + "".join(rules) + "COMMIT\n"
+
+
+def test_versions_round_trip_and_stay_small(tmp_path):
+    """
+    Tests that every version can be read back after reopening and that deltas keep the archive small.
+    """
+    archive = SnapshotArchive(str(tmp_path), "iptables", {"keyframe_interval": 10})
+    for version in range(1, 51):
+        assert archive.add(ruleset(version), timestamp=1000.0 * version) == version
+    assert archive.add(ruleset(50)) is None
+
+    reopened = SnapshotArchive(str(tmp_path), "iptables")
+    assert len(reopened.versions()) == 50
+    assert reopened.get(37) == ruleset(37)
+    assert reopened.latest() == ruleset(50)
+    assert reopened.at(12500.0) == ruleset(12)
+    assert reopened.at(500.0) is None
+
+    raw_size = sum(len(ruleset(version)) for version in range(1, 51))
+    stored = os.path.getsize(tmp_path / "iptables.archive")
+    assert stored < raw_size / 100
+
+
+def test_diff_and_report(tmp_path):
+    """
+    Tests the unified diff between two versions and the batched report over a time range.
+    """
+    archive = SnapshotArchive(str(tmp_path), "users")
+    archive.add("root:x:0:0\n", timestamp=100.0)
+    archive.add("root:x:0:0\nalice:x:1000:1000\n", timestamp=200.0)
+    archive.add("root:x:0:0\nalice:x:0:0\n", timestamp=300.0)
+
+    assert "+alice:x:1000:1000" in archive.diff(1, 2)
+    report = archive.report(since=150.0, until=300.0)
+    assert [change["version"] for change in report] == [2, 3]
+    assert "-alice:x:1000:1000" in report[1]["diff"] and "+alice:x:0:0" in report[1]["diff"]
+    assert archive.report(until=50.0) == []
+
+
+def test_retention_compacts_archive(tmp_path):
+    """
+    Tests that retention drops old versions and the remaining ones are still readable.
+    """
+    archive = SnapshotArchive(str(tmp_path), "files", {"keyframe_interval": 4, "keep_versions": 5})
+    for version in range(1, 30):
+        archive.add(ruleset(version), timestamp=float(version))
+    versions = [version for version, _ in archive.versions()]
+    assert len(versions) < 5 + 4 and versions[-1] == 29
+    assert all(archive.get(version) == ruleset(version) for version in versions)
+
+    archive.max_age_days = 1
+    assert archive.prune(now=86400 + 27.5) == len(versions) - 2
+    reopened = SnapshotArchive(str(tmp_path), "files")
+    assert [version for version, _ in reopened.versions()] == [28, 29]
+    assert reopened.get(28) == ruleset(28)
+
+
+def test_interrupted_append_is_ignored(tmp_path):
+    """
+    Tests that an index entry pointing past the end of the data file is dropped on load.
+    """
+    archive = SnapshotArchive(str(tmp_path), "iptables")
+    archive.add("a\n")
+    archive.add("b\n")
+    with open(tmp_path / "iptables.archive", "r+b") as f:
+        f.truncate(archive.index[1]["offset"])
+    reopened = SnapshotArchive(str(tmp_path), "iptables")
+    assert reopened.versions() == archive.versions()[:1]
+    assert reopened.latest() == "a\n"
+
+
+def test_iptables_monitor_archives_changes(tmp_path):
+    """
+    Tests that the iptables monitor keeps the previous rulesets in the archive when it updates its snapshot,
+    without the comments and counters that change on every iptables-save.
+    """
+    header = "# Generated by iptables-save v1.8.7 on {}\n*filter\n:INPUT ACCEPT [{}:{}]\n"
+    rules = [header.format("Mon Jan  1 00:00:00 2024", 10, 800) + "-A INPUT -j ACCEPT\nCOMMIT\n"]
+    transport = FakeHostTransport("vm0", {("iptables-save",): lambda: rules[0]})
+    config = {
+        "log_directory": str(tmp_path),
+        "iptables_monitor": {"snapshot_file": "iptables_snapshot.txt", "check_interval": 60},
+        "snapshot_archive": {"enabled": True},
+    }
+    monitor = IptablesMonitor(config, transport=transport)
+    rules[0] = header.format("Mon Jan  1 00:01:00 2024", 25, 2000) + "-A INPUT -j ACCEPT\nCOMMIT\n"
+    monitor.run_check()
+    rules[0] = header.format("Mon Jan  1 00:02:00 2024", 30, 2400) + "-A INPUT -j DROP\nCOMMIT\n"
+    monitor.run_check()
+
+    archive = open_archive(config, "iptables")
+    assert [version for version, _ in archive.versions()] == [1, 2]
+    assert archive.get(1) == "*filter\n-A INPUT -j ACCEPT\n"
+    # Only the rule change shows up, not the comment timestamps or packet counters
+    assert archive.diff(1, 2).splitlines()[2:] == ["@@ -1,2 +1,2 @@", " *filter", "--A INPUT -j ACCEPT", "+-A INPUT -j DROP"]
+
+
+def test_age_policy_applies_without_reaching_the_version_limit(tmp_path):
+    """
+    Tests that versions older than max_age_days are removed on a rarely changing archive.
+    """
+    day = 86400
+    archive = SnapshotArchive(str(tmp_path), "users", {"max_age_days": 90, "maintenance_interval": 0})
+    archive.add("root:x:0:0\n", timestamp=time.time() - 200 * day)
+    archive.add("root:x:0:0\nalice:x:1000:1000\n", timestamp=time.time() - 100 * day)
+    assert len(archive.versions()) == 2
+
+    version = archive.add("root:x:0:0\nalice:x:1000:1000\nbob:x:1001:1001\n")
+    archive.maintain()
+    assert [v for v, _ in archive.versions()] == [version]
+
+
+def test_interrupted_compaction_keeps_previous_generation(tmp_path, monkeypatch):
+    """
+    Tests that a compaction failing before the index is switched leaves the old archive readable,
+    and that a completed compaction leaves only the new generation on disk.
+    """
+    archive = SnapshotArchive(str(tmp_path), "iptables", {"keyframe_interval": 3, "keep_versions": 4})
+    for version in range(1, 7):
+        archive.add(ruleset(version), timestamp=float(version))
+
+    def crash(source, target):
+        raise OSError("simulated crash")
+
+    monkeypatch.setattr("vm_monitor.snapshot_archive.os.replace", crash)
+    with pytest.raises(OSError):
+        archive.prune()
+    monkeypatch.undo()
+    reopened = SnapshotArchive(str(tmp_path), "iptables", {"keep_versions": 4})
+    assert [version for version, _ in reopened.versions()] == [1, 2, 3, 4, 5, 6]
+    assert reopened.get(2) == ruleset(2)
+
+    assert reopened.prune() == 2
+    reopened = SnapshotArchive(str(tmp_path), "iptables")
+    assert reopened.get(3) == ruleset(3) and reopened.latest() == ruleset(6)
+    assert sorted(os.listdir(tmp_path)) == ["iptables.1.archive", "iptables.index"]
+
+
+def test_compaction_flushes_before_switching_the_index(tmp_path, monkeypatch):
+    """
+    Tests that the new data file and index are fsynced before the index is replaced, and the directory after.
+    """
+    archive = SnapshotArchive(str(tmp_path), "users", {"keep_versions": 2})
+    for version in range(1, 5):
+        archive.add(f"user{version}\n", timestamp=float(version))
+
+    calls = []
+    replace = os.replace
+    monkeypatch.setattr("vm_monitor.snapshot_archive.fsync_path", lambda path: calls.append(("fsync", path)))
+    monkeypatch.setattr("vm_monitor.snapshot_archive.os.replace",
+                        lambda source, target: calls.append(("replace", target)) or replace(source, target))
+    archive.prune()
+    assert calls == [
+        ("fsync", str(tmp_path / "users.1.archive")),
+        ("fsync", str(tmp_path / "users.index.tmp")),
+        ("replace", str(tmp_path / "users.index")),
+        ("fsync", str(tmp_path)),
+    ]
@@ -0,0 +1,218 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Alert:
+    """
+    State of one alert, keyed by the monitor that raised it and the subject it is about.
+    """
+    monitor: str
+    subject: str
+    message: str
+    level: int
+    first_seen: float
+    last_seen: float
+    count: int = 1
+    repeats_since_digest: int = 0
+    expire_after: float | None = None
+    # False while the opening message was suppressed by the rate limit and the digest has not named the alert yet
+    announced: bool = True
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        """
+        Allow bursts of up to `capacity` events, refilled at `rate` events per second.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (int): Maximum number of tokens stored.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def consume(self, now: float | None = None) -> bool:
+        """
+        Take one token if available.
+
+        Returns:
+            bool: True if the event may be emitted, False if it is rate limited.
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AlertManager:
+    def __init__(self, config: dict):
+        """
+        Initialize the alert manager.
+
+        Args:
+            config (dict): Configuration dictionary; settings are read from the "alerting" section.
+        """
+        self.logger = logger
+        alerting = config.get("alerting", {})
+        self.digest_interval = alerting.get("digest_interval", 300)
+        self.max_open_alerts = alerting.get("max_open_alerts", 1000)
+        self.max_digest_entries = alerting.get("max_digest_entries", 20)
+        self.bucket = TokenBucket(alerting.get("rate", 0.5), alerting.get("burst", 20))
+
+        self.open_alerts = {}
+        self.overflow = 0
+        self.dropped = 0
+        self.last_digest = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _emit(self, level: int, message: str) -> bool:
+        if self.bucket.consume():
+            self.logger.log(level, message)
+            return True
+        self.dropped += 1
+        return False
+
+    def fire(self, monitor: str, subject: str, message: str, level: int = logging.WARNING,
+             expire_after: float | None = None) -> bool:
+        """
+        Report that a condition is active. Only the first report of an open alert is logged;
+        repeats are counted and summarised in the next digest.
+
+        Args:
+            monitor (str): Name of the monitor raising the alert.
+            subject (str): What the alert is about, e.g. a path or an IP address.
+            message (str): Human readable description of the current state.
+            level (int): Logging level of the alert.
+            expire_after (float): Seconds without a repeat after which the alert resolves itself,
+                for conditions that are never explicitly resolved. None keeps it open until resolve().
+
+        Returns:
+            bool: True if this opened a new alert, False if it repeats an open one or
+                could not be tracked because max_open_alerts was reached.
+        """
+        key = (monitor, subject)
+        with self._lock:
+            now = time.time()
+            alert = self.open_alerts.get(key)
+            if alert is not None:
+                alert.count += 1
+                alert.repeats_since_digest += 1
+                alert.last_seen = now
+                alert.message = message
+                self._maybe_digest()
+                return False
+
+            if len(self.open_alerts) >= self.max_open_alerts:
+                self._expire(now)
+            if len(self.open_alerts) >= self.max_open_alerts:
+                # Keep memory bounded during alert storms; overflowing alerts only show up in the digest count
+                self.overflow += 1
+                self._maybe_digest()
+                return False
+
+            alert = Alert(monitor, subject, message, level, now, now, expire_after=expire_after)
+            alert.announced = self._emit(level, message)
+            self.open_alerts[key] = alert
+            self._maybe_digest()
+            return True
+
+    def resolve(self, monitor: str, subject: str, message: str | None = None) -> bool:
+        """
+        Report that a condition is no longer active.
+
+        Args:
+            monitor (str): Name of the monitor that raised the alert.
+            subject (str): What the alert is about.
+            message (str): Optional description logged when the alert closes.
+
+        Returns:
+            bool: True if an open alert was resolved, False if there was none.
+        """
+        with self._lock:
+            alert = self.open_alerts.pop((monitor, subject), None)
+            if alert is None:
+                return False
+            duration = int(time.time() - alert.first_seen)
+            resolution = message or f"Alert resolved: {monitor}/{subject}"
+            self._emit(logging.INFO, f"{resolution} (open for {duration}s, seen {alert.count} times)")
+            return True
+
+    def _expire(self, now: float) -> int:
+        expired = [
+            alert for alert in self.open_alerts.values()
+            if alert.expire_after is not None and now - alert.last_seen >= alert.expire_after
+        ]
+        for alert in expired:
+            del self.open_alerts[(alert.monitor, alert.subject)]
+            self._emit(logging.INFO, f"Alert expired: {alert.monitor}/{alert.subject} "
+                                     f"(no repeat for {int(now - alert.last_seen)}s, seen {alert.count} times)")
+        return len(expired)
+
+    def expire(self, now: float | None = None) -> int:
+        """
+        Resolve the alerts whose expire_after has passed since they last fired.
+
+        Returns:
+            int: Number of alerts expired.
+        """
+        with self._lock:
+            return self._expire(time.time() if now is None else now)
+
+    def _maybe_digest(self) -> None:
+        if time.monotonic() - self.last_digest >= self.digest_interval:
+            self._flush_digest()
+
+    def _flush_digest(self) -> None:
+        self.last_digest = time.monotonic()
+        listed = [alert for alert in self.open_alerts.values() if alert.repeats_since_digest or not alert.announced]
+        if not listed and not self.overflow and not self.dropped:
+            return
+
+        # Alerts whose opening message was rate limited come first, so every new alert is named at least once
+        listed.sort(key=lambda alert: (alert.announced, -alert.repeats_since_digest))
+        entries = [
+            f"{'new ' if not alert.announced else ''}{alert.monitor}/{alert.subject} "
+            f"x{alert.repeats_since_digest + (not alert.announced)} (last: {alert.message})"
+            for alert in listed[:self.max_digest_entries]
+        ]
+        if len(listed) > self.max_digest_entries:
+            entries.append(f"... and {len(listed) - self.max_digest_entries} more")
+        if self.overflow:
+            entries.append(f"{self.overflow} alerts not tracked (max_open_alerts reached)")
+        if self.dropped:
+            entries.append(f"{self.dropped} messages dropped by rate limit")
+
+        # The digest bypasses the token bucket so suppressed activity is always accounted for
+        self.logger.warning(f"Alert digest: {len(self.open_alerts)} open alerts; " + "; ".join(entries))
+        for alert in listed:
+            alert.repeats_since_digest = 0
+            alert.announced = True
+        self.overflow = 0
+        self.dropped = 0
+
+    def flush_digest(self) -> None:
+        """
+        Log a digest of repeated, untracked and rate limited alerts now.
+        """
+        with self._lock:
+            self._flush_digest()
+
+    def run(self) -> None:
+        """
+        Periodically expire stale alerts and flush digests so they are emitted even when no new alerts arrive.
+        """
+        while True:
+            time.sleep(self.digest_interval)
+            with self._lock:
+                self._expire(time.time())
+                self._maybe_digest()
@@ -0,0 +1,261 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# numpy is slow to import and detection is off by default, so it is loaded on first use
+np = None
+
+SECONDS_PER_HOUR = 3600
+HOURS_PER_DAY = 24
+ANOMALY_KINDS = ("deviation", "seasonal", "forecast")
+
+
+def load_numpy() -> bool:
+    """
+    Import numpy into this module the first time it is needed.
+
+    Returns:
+        bool: True if numpy is available.
+    """
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+class MetricHistory:
+    def __init__(self, capacity: int):
+        """
+        Fixed-size ring buffer of (timestamp, value) samples backed by NumPy arrays.
+
+        Args:
+            capacity (int): Maximum number of samples kept.
+        """
+        if not load_numpy():
+            raise ImportError("numpy is required for anomaly detection")
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+        self.head = 0
+
+    def extend(self, timestamps, values) -> None:
+        """
+        Append a batch of samples, overwriting the oldest ones when full.
+
+        Args:
+            timestamps: Sample times in seconds since the epoch.
+            values: Sample values.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)[-self.capacity:]
+        values = np.asarray(values, dtype=np.float64)[-self.capacity:]
+        positions = (self.head + np.arange(len(values))) % self.capacity
+        self.timestamps[positions] = timestamps
+        self.values[positions] = values
+        self.head = (self.head + len(values)) % self.capacity
+        self.count = min(self.capacity, self.count + len(values))
+
+    def arrays(self) -> tuple:
+        """
+        Return the stored samples in chronological order.
+
+        Returns:
+            tuple: (timestamps, values) arrays, oldest first.
+        """
+        if self.count < self.capacity:
+            return self.timestamps[:self.count], self.values[:self.count]
+        order = np.roll(np.arange(self.capacity), -self.head)
+        return self.timestamps[order], self.values[order]
+
+
+class AnomalyDetector:
+    def __init__(self, config: dict, metric: str, forecast: bool = False):
+        """
+        Flag samples that deviate from a metric's own recent and hour-of-day baselines,
+        and optionally forecast when a percentage metric will reach 100%.
+
+        Args:
+            config (dict): Configuration dictionary; settings are read from the "anomaly_detection" section.
+            metric (str): Name of the metric, used in messages.
+            forecast (bool): Whether to run the linear fill forecast (for disk usage).
+        """
+        if not load_numpy():
+            raise ImportError("numpy is required for anomaly detection")
+        settings = config.get("anomaly_detection", {})
+        self.logger = logger
+        self.metric = metric
+        self.forecast = forecast
+        self.alpha = settings.get("ewma_alpha", 0.05)
+        self.z_threshold = settings.get("z_threshold", 4.0)
+        # Floor for the standard deviation, in the metric's units, so a flat history
+        # (typical for disk usage) does not turn a tiny change into an extreme z-score
+        self.min_std = settings.get("min_std", 0.5)
+        self.min_samples = settings.get("min_samples", 30)
+        self.seasonal_min_samples = settings.get("seasonal_min_samples", 10)
+        # Per-hour baselines are running aggregates over all samples, independent of the window;
+        # past this many samples per hour older ones are down-weighted so the baseline can drift
+        self.seasonal_max_samples = settings.get("seasonal_max_samples", 10000)
+        self.forecast_window = settings.get("forecast_window", 360)
+        self.forecast_horizon = settings.get("forecast_horizon", 86400)
+        self.history = MetricHistory(settings.get("window", 1440))
+        # Local hour of day, so seasonal baselines line up with business hours
+        self.utc_offset = time.localtime().tm_gmtoff
+        # Count, mean and sum of squared deviations (Welford's M2) of the samples seen at each hour
+        self.hour_counts = np.zeros(HOURS_PER_DAY, dtype=np.float64)
+        self.hour_means = np.zeros(HOURS_PER_DAY, dtype=np.float64)
+        self.hour_m2 = np.zeros(HOURS_PER_DAY, dtype=np.float64)
+
+        # EWMA weights for the whole window, newest last; sliced to the current sample count
+        capacity = self.history.capacity
+        self.weights = (1 - self.alpha) ** np.arange(capacity - 1, -1, -1, dtype=np.float64)
+
+    def observe(self, value: float, timestamp: float | None = None) -> dict:
+        """
+        Add one sample and evaluate it.
+
+        Returns:
+            dict: Detected anomaly kind mapped to its description, see observe_batch().
+        """
+        return self.observe_batch([time.time() if timestamp is None else timestamp], [value])
+
+    def observe_batch(self, timestamps, values) -> dict:
+        """
+        Add a batch of samples and evaluate the newest one against the history before the batch.
+
+        Args:
+            timestamps: Sample times in seconds since the epoch.
+            values: Sample values.
+
+        Returns:
+            dict: Anomaly kind ("deviation", "seasonal", "forecast") mapped to a description.
+        """
+        previous_values = self.history.arrays()[1].copy()
+        self.history.extend(timestamps, values)
+        latest_timestamp, latest = float(timestamps[-1]), float(values[-1])
+        # Score against the hourly baselines as they were before this batch
+        seasonal = self.seasonal_zscore(latest_timestamp, latest)
+        self.update_hours(timestamps, values)
+
+        anomalies = {}
+        if len(previous_values) >= self.min_samples:
+            z = self.ewma_zscore(previous_values, latest)
+            if abs(z) >= self.z_threshold:
+                anomalies["deviation"] = (
+                    f"Anomalous {self.metric}: {latest:.1f} is {z:+.1f} standard deviations from its recent average"
+                )
+            if seasonal is not None and abs(seasonal) >= self.z_threshold:
+                anomalies["seasonal"] = (
+                    f"Anomalous {self.metric} for this hour of day: {latest:.1f} is {seasonal:+.1f} standard deviations from the usual level"
+                )
+
+        if self.forecast:
+            seconds_to_full = self.seconds_until_full()
+            if seconds_to_full is not None and seconds_to_full <= self.forecast_horizon:
+                anomalies["forecast"] = (
+                    f"{self.metric} is forecast to reach 100% in {seconds_to_full / 3600:.1f} hours at the current rate"
+                )
+        return anomalies
+
+    def ewma_zscore(self, values, latest: float) -> float:
+        """
+        Score a sample against the exponentially weighted mean and variance of the history.
+        """
+        weights = self.weights[-len(values):]
+        total = weights.sum()
+        mean = np.dot(weights, values) / total
+        variance = np.dot(weights, (values - mean) ** 2) / total
+        std = max(float(np.sqrt(variance)), self.min_std)
+        return (latest - mean) / std
+
+    def hour_of_day(self, timestamps):
+        return ((np.asarray(timestamps, dtype=np.float64) + self.utc_offset) // SECONDS_PER_HOUR % HOURS_PER_DAY).astype(np.intp)
+
+    def update_hours(self, timestamps, values) -> None:
+        """
+        Merge a batch of samples into the per-hour count, mean and M2 (Chan et al.'s parallel update).
+        """
+        hours = self.hour_of_day(timestamps)
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.bincount(hours, minlength=HOURS_PER_DAY).astype(np.float64)
+        present = counts > 0
+        means = np.zeros(HOURS_PER_DAY)
+        means[present] = np.bincount(hours, weights=values, minlength=HOURS_PER_DAY)[present] / counts[present]
+        m2 = np.bincount(hours, weights=(values - means[hours]) ** 2, minlength=HOURS_PER_DAY)
+
+        # Cap the weight of the existing aggregate, keeping its mean and variance
+        scale = np.minimum(1.0, self.seasonal_max_samples / np.maximum(self.hour_counts, 1.0))
+        old_counts = self.hour_counts * scale
+        self.hour_m2 *= scale
+
+        total = old_counts + counts
+        delta = means - self.hour_means
+        self.hour_means[present] += delta[present] * counts[present] / total[present]
+        self.hour_m2[present] += m2[present] + delta[present] ** 2 * old_counts[present] * counts[present] / total[present]
+        self.hour_counts = total
+
+    def seasonal_zscore(self, latest_timestamp: float, latest: float) -> float | None:
+        """
+        Score a sample against the running baseline of samples recorded at the same hour of day.
+
+        Returns:
+            float: The z-score, or None if that hour has too few samples.
+        """
+        hour = int(self.hour_of_day(latest_timestamp))
+        count = self.hour_counts[hour]
+        if count < self.seasonal_min_samples:
+            return None
+        std = max(float(np.sqrt(self.hour_m2[hour] / count)), self.min_std)
+        return (latest - self.hour_means[hour]) / std
+
+    def seconds_until_full(self) -> float | None:
+        """
+        Fit a linear trend to the most recent samples and extrapolate when the metric reaches 100.
+
+        Returns:
+            float: Seconds until 100% is reached, or None if the metric is not growing.
+        """
+        timestamps, values = self.history.arrays()
+        timestamps, values = timestamps[-self.forecast_window:], values[-self.forecast_window:]
+        if len(values) < self.min_samples or timestamps[-1] <= timestamps[0]:
+            return None
+        slope, intercept = np.polyfit(timestamps - timestamps[-1], values, 1)
+        if slope <= 0:
+            return None
+        return max(0.0, (100.0 - intercept) / slope)
+
+
+def create_detector(config: dict, metric: str, forecast: bool = False) -> AnomalyDetector | None:
+    """
+    Build a detector if anomaly detection is enabled and NumPy is installed.
+
+    Returns:
+        AnomalyDetector: The detector, or None when detection is disabled or unavailable.
+    """
+    if not config.get("anomaly_detection", {}).get("enabled", False):
+        return None
+    if not load_numpy():
+        logger.warning("Anomaly detection is enabled but numpy is not installed; using static thresholds only.")
+        return None
+    return AnomalyDetector(config, metric, forecast=forecast)
+
+
+def report_anomalies(alerts, monitor: str, subject: str, anomalies: dict) -> None:
+    """
+    Fire an alert for every detected anomaly kind and resolve the kinds that have cleared.
+
+    Args:
+        alerts (AlertManager): The alert manager to report through.
+        monitor (str): Name of the monitor.
+        subject (str): What the metric is about, e.g. "usage" or a path.
+        anomalies (dict): The result of AnomalyDetector.observe().
+    """
+    for kind in ANOMALY_KINDS:
+        if kind in anomalies:
+            alerts.fire(monitor, f"{subject}:{kind}", anomalies[kind])
+        else:
+            alerts.resolve(monitor, f"{subject}:{kind}")
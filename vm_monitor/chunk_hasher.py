@@ -0,0 +1,229 @@
+import os
+import mmap
+import random
+import hashlib
+from contextlib import contextmanager
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Gear table for content-defined chunking; seeded so boundaries are stable across runs
+_gear_random = random.Random(0x5EED)
+GEAR = tuple(_gear_random.getrandbits(64) for _ in range(256))
+MASK_64 = (1 << 64) - 1
+
+
+def new_hasher(algorithm: str):
+    """
+    Create a hash object for chunk digests.
+
+    Args:
+        algorithm (str): "sha256", "blake2b", or "xxhash" (falls back to blake2b if xxhash is not installed).
+
+    Returns:
+        A hashlib-compatible object with update() and hexdigest().
+    """
+    if algorithm == "xxhash" and xxhash is not None:
+        return xxhash.xxh3_128()
+    if algorithm in ("blake2b", "xxhash"):
+        return hashlib.blake2b(digest_size=16)
+    return hashlib.new(algorithm)
+
+
+def is_cryptographic(algorithm: str) -> bool:
+    """
+    Whether chunk digests made with an algorithm resist deliberate collisions.
+    xxh3 is fast but can be forged, so matching xxhash chunks do not prove a file is unchanged.
+    """
+    return not (algorithm == "xxhash" and xxhash is not None)
+
+
+@contextmanager
+def mapped(filepath: str):
+    """
+    Map a file read-only; empty files yield an empty bytes object since they cannot be mapped.
+    """
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def fixed_boundaries(data, chunk_size: int):
+    for offset in range(0, len(data), chunk_size):
+        yield offset, min(chunk_size, len(data) - offset)
+
+
+def gear_candidates(data, mask: int, block_size: int = 1 << 16):
+    """
+    Find every position where the gear hash of the 64 bytes ending there has all mask bits clear.
+    The hash is a sum of GEAR[byte] << age, so bytes older than 64 fall out of it and every position
+    can be hashed at once with NumPy by combining windows of 1, 2, 4, ... 64 bytes.
+
+    Args:
+        data: A bytes-like object or mmap.
+        mask (int): The boundary mask.
+        block_size (int): Bytes processed per NumPy pass, bounding memory to a few times this in 64-bit words.
+
+    Returns:
+        numpy.ndarray: Sorted positions (index of the last byte of the window), all at least 63.
+    """
+    import numpy as np
+    gear = np.array(GEAR, dtype=np.uint64)
+    mask = np.uint64(mask)
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    found = []
+    for block_start in range(0, len(buffer), block_size):
+        # Start 63 bytes early so the first window of the block is complete
+        low = max(0, block_start - 63)
+        hashes = gear[buffer[low:block_start + block_size]]
+        width = 1
+        while width < 64:
+            hashes[width:] = (hashes[:-width] << np.uint64(width)) + hashes[width:]
+            width *= 2
+        found.append(np.flatnonzero((hashes[63:] & mask) == 0) + (low + 63))
+    return np.concatenate(found) if found else np.zeros(0, dtype=np.intp)
+
+
+def cdc_boundaries(data, min_size: int, avg_size: int, max_size: int):
+    """
+    Split data into content-defined chunks with a gear rolling hash.
+    An insertion only moves the boundaries around it, so unchanged regions keep their digests.
+    The hash restarts min_size bytes into each chunk; from 64 bytes after that it equals the
+    hash of the last 64 bytes, so those positions are looked up in one vectorised pass over the
+    file and only the first 63 are hashed byte by byte. Without NumPy every byte is hashed in Python.
+
+    Args:
+        data: A bytes-like object or mmap.
+        min_size (int): Minimum chunk length; bytes before it are skipped without hashing.
+        avg_size (int): Target average chunk length, rounded down to a power of two.
+        max_size (int): Maximum chunk length.
+    """
+    mask = (1 << max(1, avg_size.bit_length() - 1)) - 1
+    mask <<= 64 - mask.bit_length()
+    length = len(data)
+    try:
+        import numpy as np
+        candidates = gear_candidates(data, mask) if length else None
+    except ImportError:
+        np = candidates = None
+    with memoryview(data) as view:
+        start = 0
+        while start < length:
+            end = min(start + max_size, length)
+            cut = end
+            if end - start > min_size:
+                rolling = 0
+                position = start + min_size
+                # Hash byte by byte until the window is full, or to the end without NumPy
+                stop = end if candidates is None else min(position + 63, end)
+                for byte in view[position:stop]:
+                    rolling = ((rolling << 1) + GEAR[byte]) & MASK_64
+                    position += 1
+                    if not rolling & mask:
+                        cut = position
+                        break
+                else:
+                    if candidates is not None and position < end:
+                        index = np.searchsorted(candidates, position)
+                        if index < len(candidates) and candidates[index] < end:
+                            cut = int(candidates[index]) + 1
+            yield start, cut - start
+            start = cut
+
+
+def chunk_file(filepath: str, settings: dict) -> tuple[list, str]:
+    """
+    Split a file into chunks and digest each one, computing the whole-file SHA-256 in the same pass.
+
+    Args:
+        filepath (str): Path to the file.
+        settings (dict): Chunking settings ("mode", "chunk_size", "min_chunk_size", "max_chunk_size", "algorithm").
+
+    Returns:
+        tuple: List of [offset, length, digest] chunks and the SHA-256 hex digest of the file.
+    """
+    algorithm = settings.get("algorithm", "blake2b")
+    chunk_size = settings.get("chunk_size", 1 << 20)
+    full_hasher = hashlib.sha256()
+    chunks = []
+    with mapped(filepath) as data:
+        if settings.get("mode", "fixed") == "cdc":
+            boundaries = cdc_boundaries(
+                data,
+                settings.get("min_chunk_size", chunk_size // 4),
+                chunk_size,
+                settings.get("max_chunk_size", chunk_size * 4),
+            )
+        else:
+            boundaries = fixed_boundaries(data, chunk_size)
+        # Hash through memoryviews so chunks are not copied; they must be released before the map closes
+        with memoryview(data) as view:
+            for offset, length in boundaries:
+                with view[offset:offset + length] as piece:
+                    hasher = new_hasher(algorithm)
+                    hasher.update(piece)
+                    full_hasher.update(piece)
+                chunks.append([offset, length, hasher.hexdigest()])
+    return chunks, full_hasher.hexdigest()
+
+
+def first_changed_chunk(filepath: str, entry: dict) -> int | None:
+    """
+    Check a file against its stored chunk digests, stopping at the first chunk that differs.
+
+    Args:
+        filepath (str): Path to the file.
+        entry (dict): Stored chunk index entry with "size", "algorithm" and "chunks".
+
+    Returns:
+        int: Index of the first differing chunk (len(chunks) for a size change), or None if unchanged.
+    """
+    chunks = entry["chunks"]
+    with mapped(filepath) as data:
+        if len(data) != entry["size"]:
+            return len(chunks)
+        with memoryview(data) as view:
+            for index, (offset, length, digest) in enumerate(chunks):
+                hasher = new_hasher(entry["algorithm"])
+                with view[offset:offset + length] as piece:
+                    hasher.update(piece)
+                if hasher.hexdigest() != digest:
+                    return index
+    return None
+
+
+def changed_ranges(old_entry: dict, new_entry: dict) -> list[tuple[int, int]]:
+    """
+    List the byte ranges of the new file that are not present in the old one.
+    Fixed-size chunks are compared by position; content-defined chunks by digest, so shifted data is not reported.
+
+    Args:
+        old_entry (dict): Previous chunk index entry.
+        new_entry (dict): Current chunk index entry.
+
+    Returns:
+        list: Merged (start, end) byte ranges, end exclusive. A shrunk file reports its truncated tail.
+    """
+    if new_entry["mode"] == "cdc" and old_entry["mode"] == "cdc":
+        known = {digest for _, _, digest in old_entry["chunks"]}
+        changed = [(offset, offset + length) for offset, length, digest in new_entry["chunks"] if digest not in known]
+    else:
+        known = {tuple(chunk) for chunk in old_entry["chunks"]}
+        changed = [(offset, offset + length) for offset, length, digest in new_entry["chunks"] if (offset, length, digest) not in known]
+
+    if new_entry["size"] < old_entry["size"]:
+        changed.append((new_entry["size"], old_entry["size"]))
+
+    merged = []
+    for start, end in sorted(changed):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from vm_monitor import log_utils
+from vm_monitor.transport import SSHConnectionPool, TrackedTransport
+from vm_monitor.iptables_monitor import IptablesMonitor
+from vm_monitor.user_monitor import UsersMonitor
+from vm_monitor.service_monitor import ServiceMonitor
+from vm_monitor.file_monitor import FileIntegrityMonitor
+
+logger = logging.getLogger(__name__)
+
+# Checks that only need command output from the host, so they can run over any transport
+REMOTE_CHECKS = {
+    "iptables": IptablesMonitor,
+    "users": UsersMonitor,
+    "services": ServiceMonitor,
+    "files": FileIntegrityMonitor,
+}
+
+
+class RemoteCollector:
+    def __init__(self, config: dict, transport_factory=None):
+        """
+        Initialize the multi-host collector.
+
+        Args:
+            config (dict): Agent configuration; the "collector" section lists hosts and limits.
+            transport_factory (callable): Maps a host entry to a Transport, defaults to the pooled SSH transport.
+        """
+        self.logger = logger
+        self.config = config
+        collector_config = config["collector"]
+        self.hosts = collector_config["hosts"]
+        self.checks = collector_config.get("checks", list(REMOTE_CHECKS))
+        self.check_interval = collector_config.get("check_interval", config.get("check_interval", 60))
+        self.max_concurrency = collector_config.get("max_concurrency", 64)
+        self.per_host_concurrency = collector_config.get("per_host_concurrency", 2)
+        self.command_timeout = collector_config.get("command_timeout", 30)
+
+        self.pool = SSHConnectionPool(collector_config.get("ssh", {}))
+        self.transport_factory = transport_factory or self.pool.get
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="collector")
+        self.host_checks = {}
+
+    @staticmethod
+    def host_name(host: str | dict) -> str:
+        return host["host"] if isinstance(host, dict) else host
+
+    def host_config(self, host: str) -> dict:
+        """
+        Build the configuration for one host, keeping its snapshots in a separate directory.
+
+        Args:
+            host (str): The host name.
+
+        Returns:
+            dict: A copy of the agent configuration with a per-host log directory and the command timeout.
+        """
+        log_directory = os.path.join(self.config["log_directory"], "hosts", host)
+        os.makedirs(log_directory, exist_ok=True)
+        return dict(self.config, log_directory=log_directory, command_timeout=self.command_timeout)
+
+    def build_checks(self, host: str | dict) -> tuple:
+        """
+        Instantiate the enabled checks for a host on top of its transport.
+
+        Args:
+            host (str | dict): The host entry from the configuration.
+
+        Returns:
+            tuple: The tracked transport of the host and the check instances bound to it.
+        """
+        name = self.host_name(host)
+        transport = TrackedTransport(self.transport_factory(host))
+        transport.connect()
+        host_config = self.host_config(name)
+        return transport, [REMOTE_CHECKS[check](config=host_config, transport=transport) for check in self.checks]
+
+    async def run_in_executor(self, func, limit: asyncio.Semaphore):
+        # The slot is held until the worker thread returns; each command is bounded by
+        # command_timeout inside the transport, which kills the process rather than abandoning it
+        async with limit:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func)
+
+    async def check_host(self, host: str | dict, global_limit: asyncio.Semaphore) -> bool:
+        """
+        Run every enabled check against one host, at most per_host_concurrency at a time.
+
+        Args:
+            host (str | dict): The host entry from the configuration.
+            global_limit (asyncio.Semaphore): Limits how many checks run at once across all hosts.
+
+        Returns:
+            bool: True if at least one command reached the host, False if the host could not be checked.
+        """
+        name = self.host_name(host)
+        if name not in self.host_checks:
+            try:
+                self.host_checks[name] = await self.run_in_executor(lambda: self.build_checks(host), global_limit)
+            except Exception as e:
+                self.logger.error(f"Error connecting to host {name}: {str(e) or type(e).__name__}")
+                return False
+        transport, checks = self.host_checks[name]
+        transport.reset()
+
+        host_limit = asyncio.Semaphore(self.per_host_concurrency)
+
+        async def run_check(check):
+            async with host_limit:
+                await self.run_in_executor(check.run_check, global_limit)
+
+        results = await asyncio.gather(*(run_check(check) for check in checks), return_exceptions=True)
+        for check, result in zip(checks, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Error running {type(check).__name__} on {name}: {str(result) or type(result).__name__}")
+        # The checks log and swallow command failures, so judge the host by its commands instead
+        if transport.completed == 0:
+            self.logger.error(f"No command reached host {name}; {transport.failed} failed.")
+            return False
+        return True
+
+    async def sweep(self) -> int:
+        """
+        Check every configured host once, fanning out across hosts concurrently.
+
+        Returns:
+            int: Number of hosts checked successfully.
+        """
+        started = time.monotonic()
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self.check_host(host, global_limit) for host in self.hosts))
+        succeeded = sum(results)
+        self.logger.info(
+            f"Collected from {succeeded}/{len(self.hosts)} hosts in {time.monotonic() - started:.2f}s."
+        )
+        return succeeded
+
+    async def run_forever(self) -> None:
+        while True:
+            started = time.monotonic()
+            await self.sweep()
+            await asyncio.sleep(max(0.0, self.check_interval - (time.monotonic() - started)))
+
+    def run(self) -> None:
+        """
+        Sweep all hosts at the configured interval until interrupted.
+        """
+        try:
+            asyncio.run(self.run_forever())
+        finally:
+            self.executor.shutdown(wait=False)
+            self.pool.close_all()
+
+
+if __name__ == "__main__":
+    log_utils.configure_logging()
+    with open("config.json", "r") as f:
+        RemoteCollector(json.load(f)).run()
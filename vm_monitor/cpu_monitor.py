@@ -1,22 +1,35 @@
+import time
+import logging
 import psutil
-from log_utils import configure_logging
+from alert_manager import AlertManager
+from anomaly import create_detector, report_anomalies
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class CPUMonitor:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, snapshot_source=None, alert_manager=None):
         """
         Initialize the CPUMonitor with a configuration.
 
         Args:
             config (dict): Configuration dictionary for CPU settings.
+            snapshot_source (ProcSnapshotCollector): Optional shared collector to read usage from.
+            alert_manager (AlertManager): Shared alert manager, a private one is created if omitted.
         """
         self.logger = logger
+        self.alerts = alert_manager or AlertManager(config)
+        self.snapshot_source = snapshot_source
+        # Learns the normal level of the metric; None unless anomaly_detection is enabled and numpy is installed
+        # Time of the sample returned by get_usage(), so the detector never sees a snapshot twice
+        self.sample_time = None
+        self.observed_time = None
+        self.detector = create_detector(config, "CPU usage")
         self.cpu_threshold = config.get("cpu_threshold", 90)  # Default to 90% if not specified
 
     def get_usage(self, interval: int = 1) -> float | None:
         """
         Returns the current CPU usage as a percentage.
+        Uses the shared system snapshot while it is fresh and falls back to psutil.
         Logs an error if CPU usage cannot be retrieved.
 
         Args:
@@ -25,6 +38,12 @@ class CPUMonitor:
         Returns:
             float: Current CPU usage percentage.
         """
+        if self.snapshot_source is not None:
+            snapshot = self.snapshot_source.fresh()
+            if snapshot is not None and snapshot.cpu_percent is not None:
+                self.sample_time = snapshot.timestamp
+                return snapshot.cpu_percent
+        self.sample_time = time.time()
         try:
             return psutil.cpu_percent(interval=interval)
         except Exception as e:
@@ -41,6 +60,16 @@ class CPUMonitor:
         usage = self.get_usage(interval)
         if usage is not None:
             if usage > self.cpu_threshold:
-                self.logger.warning(f"High CPU usage detected: {usage}% (Threshold: {self.cpu_threshold}%)")
+                self.alerts.fire("cpu", "usage", f"High CPU usage detected: {usage}% (Threshold: {self.cpu_threshold}%)")
             else:
-                self.logger.info(f"Current CPU usage is at {usage}%")
\ No newline at end of file
+                self.alerts.resolve("cpu", "usage", f"CPU usage back below threshold: {usage}%")
+                self.logger.info(f"Current CPU usage is at {usage}%")
+            if self.detector is not None and (self.sample_time is None or self.sample_time != self.observed_time):
+                self.observed_time = self.sample_time
+                report_anomalies(self.alerts, "cpu", "usage", self.detector.observe(usage, self.sample_time))
+
+    def run_check(self) -> None:
+        """
+        Checks the CPU usage once.
+        """
+        self.check_cpu_usage()
@@ -1,22 +1,40 @@
+import time
+import logging
 import psutil
-from log_utils import configure_logging
+from alert_manager import AlertManager
+from anomaly import create_detector, report_anomalies
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class DiskMonitor:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, snapshot_source=None, alert_manager=None):
         """
         Initialize the DiskMonitor with a configuration.
 
         Args:
             config (dict): Configuration dictionary for disk settings.
+            snapshot_source (ProcSnapshotCollector): Optional shared collector to read usage from.
+            alert_manager (AlertManager): Shared alert manager, a private one is created if omitted.
         """
         self.logger = logger
+        self.alerts = alert_manager or AlertManager(config)
+        self.snapshot_source = snapshot_source
         self.disk_threshold = config.get("disk_threshold", 85)  # Default to 85% if not specified
+        self.disk_paths = config.get("disk_paths", ["/"])
+        # One detector per path, with a fill forecast; empty unless anomaly_detection is enabled and numpy is installed
+        self.detectors = {}
+        # Per-path time of the latest sample, so the detectors never see a snapshot twice
+        self.sample_times = {}
+        self.observed_times = {}
+        for path in self.disk_paths:
+            detector = create_detector(config, f"Disk usage of {path}", forecast=True)
+            if detector is not None:
+                self.detectors[path] = detector
 
     def get_usage(self, path: str = "/") -> float | None:
         """
         Returns the current disk usage as a percentage.
+        Uses a fresh shared system snapshot when it covers the path and falls back to psutil.
         Logs an error if disk usage cannot be retrieved.
 
         Args:
@@ -25,6 +43,12 @@ class DiskMonitor:
         Returns:
             float: Current disk usage percentage.
         """
+        if self.snapshot_source is not None:
+            snapshot = self.snapshot_source.fresh()
+            if snapshot is not None and path in snapshot.disk_usage:
+                self.sample_times[path] = snapshot.timestamp
+                return snapshot.disk_usage[path]
+        self.sample_times[path] = time.time()
         try:
             disk_info = psutil.disk_usage(path)
             return disk_info.percent
@@ -42,6 +66,18 @@ class DiskMonitor:
         usage = self.get_usage(path)
         if usage is not None:
             if usage > self.disk_threshold:
-                self.logger.warning(f"High disk usage detected: {usage}% (Threshold: {self.disk_threshold}%)")
+                self.alerts.fire("disk", path, f"High disk usage detected: {usage}% (Threshold: {self.disk_threshold}%) for path: {path}")
             else:
+                self.alerts.resolve("disk", path, f"Disk usage back below threshold: {usage}% for path: {path}")
                 self.logger.info(f"Current disk usage at {usage}% for path: {path}")
+            sample_time = self.sample_times.get(path)
+            if path in self.detectors and (sample_time is None or sample_time != self.observed_times.get(path)):
+                self.observed_times[path] = sample_time
+                report_anomalies(self.alerts, "disk", path, self.detectors[path].observe(usage, sample_time))
+
+    def run_check(self) -> None:
+        """
+        Checks the disk usage of every configured path once.
+        """
+        for path in self.disk_paths:
+            self.check_disk_usage(path)
@@ -1,24 +1,40 @@
 import os
+import json
 import hashlib
 import time
-from log_utils import configure_logging
+import logging
+from transport import LocalTransport
+from log_utils import host_logger
+from chunk_hasher import chunk_file, first_changed_chunk, changed_ranges, is_cryptographic
+from snapshot_archive import open_archive
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class FileIntegrityMonitor:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, transport=None):
         """
         Initialize the File Integrity Monitor.
 
         Args:
             config (dict): Configuration dictionary for FileIntegrityMonitor settings.
+            transport (Transport): Where the monitored files live, defaults to the local machine.
         """
-        self.logger = logger
+        self.transport = transport or LocalTransport()
+        self.logger = host_logger(logger, self.transport)
         self.snapshot_file = os.path.join(config["log_directory"], config["file_monitor"]["snapshot_file"])
         self.monitored_files = config["file_monitor"]["monitored_files"]
         self.check_interval = config["file_monitor"]["check_interval"]
+        self.command_timeout = config.get("command_timeout", 30)
+
+        # Optional per-chunk digests, so large files can be verified quickly and changes located
+        self.chunking = config["file_monitor"].get("chunking") if self.transport.is_local else None
+        self.chunk_index_file = f"{self.snapshot_file}.chunks.json"
+        self.chunk_index = self.load_chunk_index() if self.chunking else {}
+        self.changed_regions = {}
 
         os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+        # Optional history of every set of hashes, so past states can be queried
+        self.archive = open_archive(config, "files", seed_file=self.snapshot_file)
 
         if not os.path.exists(self.snapshot_file):
             self.logger.info(f"No file integrity snapshot found at {self.snapshot_file}. Saving initial snapshot.")
@@ -34,6 +50,10 @@ class FileIntegrityMonitor:
         Returns:
             str: The hash of the file's content, or None if the file cannot be read.
         """
+        if not self.transport.is_local:
+            return self.hash_remote_file(filepath)
+        if self.chunking:
+            return self.hash_file_chunked(filepath)
         try:
             hasher = hashlib.sha256()
             with open(filepath, 'rb') as f:
@@ -44,6 +64,110 @@ class FileIntegrityMonitor:
             self.logger.error(f"Error hashing file {filepath}: {str(e)}")
             return None
 
+    def hash_remote_file(self, filepath: str) -> str | None:
+        """
+        Calculate the hash of a file on the transport's host with sha256sum.
+
+        Args:
+            filepath (str): Path to the file on the remote host.
+
+        Returns:
+            str: The hash of the file's content, or None if the file cannot be read.
+        """
+        try:
+            result = self.transport.run(['sha256sum', '--', filepath], timeout=self.command_timeout)
+            if result.returncode != 0:
+                self.logger.error(f"Error hashing file {filepath}: {result.stderr.decode('utf-8')}")
+                return None
+            return result.stdout.decode('utf-8').split()[0]
+        except Exception as e:
+            self.logger.error(f"Error hashing file {filepath}: {str(e)}")
+            return None
+
+    def hash_file_chunked(self, filepath: str) -> str | None:
+        """
+        Calculate the hash of a file using its stored chunk digests.
+        An unchanged file is verified with the chunk digests and keeps its saved SHA-256;
+        otherwise verification stops at the first differing chunk and the file is re-chunked.
+        Re-chunking always reads the whole file, so a changed file is read once in full after
+        the partial verification pass. Chunk digests only save reading when nothing changed.
+        Non-cryptographic chunk digests (xxhash) cannot prove a file unchanged, so with them
+        the verification pass is skipped and every file is re-chunked in a single pass.
+
+        Args:
+            filepath (str): Path to the file.
+
+        Returns:
+            str: The SHA-256 hash of the file's content, or None if the file cannot be read.
+        """
+        mode = self.chunking.get("mode", "fixed")
+        algorithm = self.chunking.get("algorithm", "blake2b")
+        saved = self.chunk_index.get(filepath)
+        try:
+            if (saved and saved["mode"] == mode and saved["algorithm"] == algorithm
+                    and is_cryptographic(algorithm) and first_changed_chunk(filepath, saved) is None):
+                return saved["sha256"]
+
+            chunks, file_hash = chunk_file(filepath, self.chunking)
+            entry = {
+                "size": chunks[-1][0] + chunks[-1][1] if chunks else 0,
+                "mode": mode,
+                "algorithm": algorithm,
+                "sha256": file_hash,
+                "chunks": chunks,
+            }
+            if saved:
+                self.changed_regions[filepath] = changed_ranges(saved, entry)
+            self.chunk_index[filepath] = entry
+            return file_hash
+        except Exception as e:
+            self.logger.error(f"Error hashing file {filepath}: {str(e)}")
+            return None
+
+    def load_chunk_index(self) -> dict:
+        """
+        Load the per-chunk digests saved alongside the snapshot file.
+
+        Returns:
+            dict: A dictionary mapping file paths to their chunk index entries.
+        """
+        if not os.path.exists(self.chunk_index_file):
+            return {}
+        try:
+            with open(self.chunk_index_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading chunk index: {str(e)}")
+            return {}
+
+    def save_chunk_index(self) -> None:
+        if not self.chunking:
+            return
+        try:
+            with open(self.chunk_index_file, 'w') as f:
+                json.dump(self.chunk_index, f)
+        except Exception as e:
+            self.logger.error(f"Error saving chunk index: {str(e)}")
+
+    def describe_changes(self, filepath: str, limit: int = 10) -> str:
+        """
+        Format the changed byte ranges of a file for the modification warning.
+
+        Args:
+            filepath (str): Path to the file.
+            limit (int): Maximum number of ranges to list.
+
+        Returns:
+            str: A suffix such as " (changed byte ranges: 0-4095, 8192-8199)", or "" if unknown.
+        """
+        ranges = self.changed_regions.get(filepath)
+        if not ranges:
+            return ""
+        listed = ", ".join(f"{start}-{end - 1}" for start, end in ranges[:limit])
+        if len(ranges) > limit:
+            listed += f" and {len(ranges) - limit} more"
+        return f" (changed byte ranges: {listed})"
+
     def save_initial_snapshot(self) -> None:
         """
         Save the initial snapshot of monitored files with their hashes.
@@ -57,6 +181,8 @@ class FileIntegrityMonitor:
             with open(self.snapshot_file, 'w') as f:
                 for filepath, filehash in snapshot.items():
                     f.write(f"{filepath},{filehash}\n")
+            self.save_chunk_index()
+            self.archive_snapshot(snapshot)
             self.logger.info(f"Saved initial file integrity snapshot to {self.snapshot_file}.")
         except Exception as e:
             self.logger.error(f"Error saving initial snapshot: {str(e)}")
@@ -82,6 +208,7 @@ class FileIntegrityMonitor:
         """
         Compare current file hashes with the snapshot and log changes.
         """
+        self.changed_regions = {}
         current_snapshot = {file: self.hash_file(file) for file in self.monitored_files}
         saved_snapshot = self.load_snapshot()
 
@@ -89,10 +216,11 @@ class FileIntegrityMonitor:
             if file not in saved_snapshot:
                 self.logger.warning(f"New file detected: {file}")
             elif saved_snapshot[file] != current_hash:
-                self.logger.warning(f"File modified: {file}")
+                self.logger.warning(f"File modified: {file}{self.describe_changes(file)}")
 
         for file in saved_snapshot.keys() - current_snapshot.keys():
             self.logger.warning(f"File removed: {file}")
+            self.chunk_index.pop(file, None)
 
         self.update_snapshot(current_snapshot)
 
@@ -107,14 +235,32 @@ class FileIntegrityMonitor:
             with open(self.snapshot_file, 'w') as f:
                 for filepath, filehash in snapshot.items():
                     f.write(f"{filepath},{filehash}\n")
+            self.save_chunk_index()
+            self.archive_snapshot(snapshot)
             self.logger.info(f"Updated file integrity snapshot at {self.snapshot_file}.")
         except Exception as e:
             self.logger.error(f"Error updating snapshot: {str(e)}")
 
+    def archive_snapshot(self, snapshot: dict) -> None:
+        """
+        Record the snapshot in the history archive; unchanged snapshots are not stored again.
+
+        Args:
+            snapshot (dict): A dictionary mapping file paths to their hashes.
+        """
+        if self.archive is not None:
+            self.archive.add("".join(f"{filepath},{filehash}\n" for filepath, filehash in snapshot.items()))
+
+    def run_check(self) -> None:
+        """
+        Compare the monitored files against the snapshot once.
+        """
+        self.compare_files()
+
     def monitor_files(self) -> None:
         """
         Continuously monitor files for changes.
         """
         while True:
-            self.compare_files()
+            self.run_check()
             time.sleep(self.check_interval)
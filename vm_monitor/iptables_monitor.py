@@ -1,17 +1,23 @@
-import subprocess
 import os
 import time
-from log_utils import configure_logging
+import logging
+from transport import LocalTransport
+from log_utils import host_logger
+from snapshot_archive import open_archive
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class IptablesMonitor:
-    def __init__(self, config: dict):
-        self.logger = logger
+    def __init__(self, config: dict, transport=None):
+        self.transport = transport or LocalTransport()
+        self.logger = host_logger(logger, self.transport)
         self.snapshot_file = os.path.join(config["log_directory"], config["iptables_monitor"]["snapshot_file"])
         self.check_interval = config["iptables_monitor"]["check_interval"]
+        self.command_timeout = config.get("command_timeout", 30)
 
         os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+        # Optional history of every ruleset the snapshot has held, without comments and counters
+        self.archive = open_archive(config, "iptables", seed_file=self.snapshot_file, normalize=self.archived_rules)
 
         if not os.path.exists(self.snapshot_file):
             self.logger.info(f"No iptables snapshot found at {self.snapshot_file}. Saving initial snapshot.")
@@ -19,7 +25,7 @@ class IptablesMonitor:
 
     def get_current_iptables(self) -> str | None:
         try:
-            result = subprocess.run(['iptables-save'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            result = self.transport.run(['iptables-save'], timeout=self.command_timeout)
             if result.returncode != 0:
                 self.logger.error(f"Error executing iptables-save: {result.stderr.decode('utf-8')}")
                 return None
@@ -34,6 +40,8 @@ class IptablesMonitor:
             try:
                 with open(self.snapshot_file, 'w') as f:
                     f.write(iptables_rules)
+                if self.archive is not None:
+                    self.archive.add(self.archived_rules(iptables_rules))
                 self.logger.info(f"Saved initial iptables rules to {self.snapshot_file}.")
             except Exception as e:
                 self.logger.error(f"Error saving iptables rules to {self.snapshot_file}: {str(e)}")
@@ -57,6 +65,13 @@ class IptablesMonitor:
             cleaned_rules.append(line)
         return "\n".join(cleaned_rules)
 
+    def archived_rules(self, rules: str) -> str:
+        """
+        The form of a ruleset kept in the history archive: cleaned like the comparison,
+        so diffs between versions only show rule changes, and newline-terminated.
+        """
+        return self.clean_iptables_rules(rules) + "\n"
+
     def compare_iptables(self) -> bool:
         current_rules = self.get_current_iptables()
         if not current_rules:
@@ -86,13 +101,20 @@ class IptablesMonitor:
             try:
                 with open(self.snapshot_file, 'w') as f:
                     f.write(current_rules)
+                if self.archive is not None:
+                    self.archive.add(self.archived_rules(current_rules))
                 self.logger.info(f"Updated iptables rules in {self.snapshot_file}.")
             except Exception as e:
                 self.logger.error(f"Error updating iptables snapshot in {self.snapshot_file}: {str(e)}")
 
+    def run_check(self) -> None:
+        if self.compare_iptables():
+            self.logger.warning("iptables rules have changed. Updating snapshot.")
+            self.update_iptables_snapshot()
+        if self.archive is not None:
+            self.archive.maintain()
+
     def monitor_iptables(self) -> None:
         while True:
-            if self.compare_iptables():
-                self.logger.warning("iptables rules have changed. Updating snapshot.")
-                self.update_iptables_snapshot()
+            self.run_check()
             time.sleep(self.check_interval)
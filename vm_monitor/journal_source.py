@@ -0,0 +1,195 @@
+import os
+import json
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# sshd runs as ssh.service on Debian/Ubuntu and sshd.service elsewhere; per-connection
+# (socket activated) instances and PAM messages are matched through the syslog identifier
+DEFAULT_UNITS = ("sshd.service", "ssh.service")
+DEFAULT_IDENTIFIERS = ("sshd",)
+
+
+class JournalAuthSource:
+    def __init__(self, cursor_file: str, units: tuple = DEFAULT_UNITS, identifiers: tuple = DEFAULT_IDENTIFIERS,
+                 prefilter: tuple = (), journalctl: str = "journalctl"):
+        """
+        Stream sshd/PAM entries from the systemd journal through a long-lived `journalctl -f -o json`.
+        Filtering by unit happens inside journalctl, and only lines containing one of the
+        prefilter byte strings are decoded in Python.
+
+        Args:
+            cursor_file (str): File where the journal cursor is persisted between runs.
+            units (tuple): _SYSTEMD_UNIT values to follow.
+            identifiers (tuple): SYSLOG_IDENTIFIER values to follow.
+            prefilter (tuple): Byte strings a raw entry must contain to be decoded; empty decodes everything.
+            journalctl (str): Path to the journalctl binary.
+        """
+        self.logger = logger
+        self.cursor_file = cursor_file
+        self.units = units
+        self.identifiers = identifiers
+        self.prefilter = tuple(prefilter)
+        self.journalctl = journalctl
+        self.cursor = self.load_cursor()
+        self.process = None
+        self.pending = b""
+        # Tail of journalctl's stderr, and whether the current process resumed from a cursor and produced output
+        self.errors = b""
+        self.resumed = False
+        self.received = False
+
+    def load_cursor(self) -> str | None:
+        if not os.path.exists(self.cursor_file):
+            return None
+        try:
+            with open(self.cursor_file, 'r') as f:
+                return f.read().strip() or None
+        except Exception as e:
+            self.logger.error(f"Error loading journal cursor from {self.cursor_file}: {str(e)}")
+            return None
+
+    def save_cursor(self) -> None:
+        """
+        Persist the cursor atomically so a crash never leaves a truncated cursor behind.
+        """
+        try:
+            temporary = f"{self.cursor_file}.tmp"
+            with open(temporary, 'w') as f:
+                f.write(self.cursor)
+            os.replace(temporary, self.cursor_file)
+        except Exception as e:
+            self.logger.error(f"Error saving journal cursor to {self.cursor_file}: {str(e)}")
+
+    def discard_cursor(self) -> None:
+        """
+        Forget a cursor journalctl cannot seek to, so the next start follows from the end of the journal.
+        """
+        self.cursor = None
+        try:
+            os.remove(self.cursor_file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.error(f"Error removing journal cursor {self.cursor_file}: {str(e)}")
+
+    def build_command(self) -> list[str]:
+        """
+        Build the journalctl command, resuming after the saved cursor or starting at the end of the journal.
+
+        Returns:
+            list[str]: The command and its arguments.
+        """
+        command = [self.journalctl, "--follow", "--output=json", "--no-pager", "--quiet"]
+        command += [f"--after-cursor={self.cursor}"] if self.cursor else ["--lines=0"]
+        matches = [f"_SYSTEMD_UNIT={unit}" for unit in self.units]
+        if self.identifiers:
+            matches.append("+")
+            matches += [f"SYSLOG_IDENTIFIER={identifier}" for identifier in self.identifiers]
+        return command + matches
+
+    def start(self) -> None:
+        if self.process is not None:
+            self.process.stdout.close()
+            self.process.stderr.close()
+        self.process = subprocess.Popen(self.build_command(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        os.set_blocking(self.process.stdout.fileno(), False)
+        os.set_blocking(self.process.stderr.fileno(), False)
+        self.pending = b""
+        self.errors = b""
+        self.resumed = self.cursor is not None
+        self.received = False
+
+    def read_available(self, stream=None) -> bytes:
+        """
+        Read everything journalctl has written so far to stdout, or to the given stream, without blocking.
+        """
+        stream = stream or self.process.stdout
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(stream.fileno(), 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    @staticmethod
+    def decode_message(entry: dict) -> str:
+        message = entry.get("MESSAGE", "")
+        # journalctl emits non-UTF-8 messages as an array of byte values
+        if isinstance(message, list):
+            return bytes(message).decode(errors="replace")
+        return message or ""
+
+    def read_messages(self) -> list[str]:
+        """
+        Return the messages of the entries written since the previous call.
+        journalctl is (re)started from the saved cursor when it is not running.
+
+        Returns:
+            list[str]: MESSAGE fields of entries that passed the prefilter.
+        """
+        if self.process is None:
+            self.start()
+        elif self.process.poll() is not None:
+            self.handle_exit()
+            self.start()
+
+        # Keep draining stderr so journalctl never blocks on it; the tail explains a later exit
+        self.errors = (self.errors + self.read_available(self.process.stderr))[-4096:]
+        output = self.read_available()
+        self.received = self.received or bool(output)
+        lines = (self.pending + output).split(b"\n")
+        self.pending = lines.pop()
+        lines = [line for line in lines if line]
+        if not lines:
+            return []
+
+        messages = []
+        for line in lines:
+            # Byte-array messages cannot be prefiltered as text, so they are always decoded
+            if self.prefilter and b'"MESSAGE":[' not in line and not any(pattern in line for pattern in self.prefilter):
+                continue
+            try:
+                messages.append(self.decode_message(json.loads(line)))
+            except ValueError as e:
+                self.logger.error(f"Error decoding journal entry: {str(e)}")
+
+        # Only the newest entry's cursor is needed to resume
+        try:
+            self.cursor = json.loads(lines[-1])["__CURSOR"]
+            self.save_cursor()
+        except (ValueError, KeyError) as e:
+            self.logger.error(f"Error reading journal cursor: {str(e)}")
+        return messages
+
+    def handle_exit(self) -> None:
+        """
+        Log why journalctl exited. If it failed without output right after resuming from the
+        saved cursor, the cursor is unusable (e.g. "Failed to seek to cursor"), and retrying it
+        would fail forever, so it is discarded and the next start follows from the end of the journal.
+        """
+        returncode = self.process.returncode
+        error = (self.errors + self.read_available(self.process.stderr)).decode(errors="replace").strip()
+        detail = f": {error.splitlines()[-1]}" if error else ""
+        if returncode != 0 and self.resumed and not self.received:
+            self.logger.warning(
+                f"journalctl could not resume from cursor {self.cursor} (status {returncode}){detail}; "
+                f"following from the end of the journal instead."
+            )
+            self.discard_cursor()
+        else:
+            self.logger.warning(f"journalctl exited with status {returncode}{detail}, restarting it.")
+
+    def close(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+        if self.process is not None:
+            self.process.stdout.close()
+            self.process.stderr.close()
+        self.process = None
@@ -1,5 +1,9 @@
 import logging.config
 import os
+import threading
+
+_configured = False
+_configure_lock = threading.Lock()
 
 def create_log_directory(log_dir):
     """
@@ -19,10 +23,15 @@ def create_log_directory(log_dir):
 def configure_logging():
     """
     Configures the logging system based on logging.conf configuration.
+    Only the first call reads the configuration; later calls return the already configured root logger.
     """
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'logging.conf')
-    create_log_directory(os.path.join(os.path.dirname(__file__), '..', 'logs'))
-    logging.config.fileConfig(config_path, disable_existing_loggers=False)
+    global _configured
+    with _configure_lock:
+        if not _configured:
+            config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'logging.conf')
+            create_log_directory(os.path.join(os.path.dirname(__file__), '..', 'logs'))
+            logging.config.fileConfig(config_path, disable_existing_loggers=False)
+            _configured = True
     return logging.getLogger()
 
 def log_warning(message: str) -> None:
@@ -54,3 +63,26 @@ def log_info(message: str) -> None:
     """
     logger = configure_logging()
     logger.info(message)
+
+class HostLoggerAdapter(logging.LoggerAdapter):
+    """
+    Prefixes every message with the host it concerns, so findings from remote checks can be told apart.
+    """
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['host']}] {msg}", kwargs
+
+def host_logger(logger: logging.Logger, transport) -> logging.Logger | logging.LoggerAdapter:
+    """
+    Returns a logger scoped to the host a check runs against.
+
+    Args:
+       logger (logging.Logger): The module logger of the check.
+       transport (Transport): The transport the check runs its commands through.
+
+    Returns:
+       The logger itself for the local machine, otherwise an adapter naming the remote host.
+    """
+    if transport.is_local:
+        return logger
+    return HostLoggerAdapter(logger, {"host": transport.host})
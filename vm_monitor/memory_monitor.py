@@ -1,27 +1,46 @@
+import time
+import logging
 import psutil
-from log_utils import configure_logging
+from alert_manager import AlertManager
+from anomaly import create_detector, report_anomalies
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class MemoryMonitor:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, snapshot_source=None, alert_manager=None):
         """
         Initialize the MemoryMonitor with a configuration.
 
         Args:
             config (dict): Configuration dictionary for memory settings.
+            snapshot_source (ProcSnapshotCollector): Optional shared collector to read usage from.
+            alert_manager (AlertManager): Shared alert manager, a private one is created if omitted.
         """
         self.logger = logger
+        self.alerts = alert_manager or AlertManager(config)
+        self.snapshot_source = snapshot_source
+        # Learns the normal level of the metric; None unless anomaly_detection is enabled and numpy is installed
+        # Time of the sample returned by get_usage(), so the detector never sees a snapshot twice
+        self.sample_time = None
+        self.observed_time = None
+        self.detector = create_detector(config, "Memory usage")
         self.memory_threshold = config.get("memory_threshold", 80)  
 
     def get_usage(self) -> float | None:
         """
         Returns the current memory usage as a percentage.
+        Uses the shared system snapshot while it is fresh and falls back to psutil.
         Logs an error if memory usage cannot be retrieved.
 
         Returns:
             float: Current memory usage percentage.
         """
+        if self.snapshot_source is not None:
+            snapshot = self.snapshot_source.fresh()
+            if snapshot is not None and snapshot.memory_percent is not None:
+                self.sample_time = snapshot.timestamp
+                return snapshot.memory_percent
+        self.sample_time = time.time()
         try:
             memory_info = psutil.virtual_memory()
             return memory_info.percent
@@ -36,6 +55,16 @@ class MemoryMonitor:
         usage = self.get_usage()
         if usage is not None:
             if usage > self.memory_threshold:
-                self.logger.warning(f"High memory usage detected: {usage}% (Threshold: {self.memory_threshold}%)")
+                self.alerts.fire("memory", "usage", f"High memory usage detected: {usage}% (Threshold: {self.memory_threshold}%)")
             else:
+                self.alerts.resolve("memory", "usage", f"Memory usage back below threshold: {usage}%")
                 self.logger.info(f"Current memory usage is at {usage}%")
+            if self.detector is not None and (self.sample_time is None or self.sample_time != self.observed_time):
+                self.observed_time = self.sample_time
+                report_anomalies(self.alerts, "memory", "usage", self.detector.observe(usage, self.sample_time))
+
+    def run_check(self) -> None:
+        """
+        Checks the memory usage once.
+        """
+        self.check_memory_usage()
@@ -1,20 +1,17 @@
 import threading
 import time
 import json
-from vm_monitor import log_utils, service_monitor
-from vm_monitor.cpu_monitor import CPUMonitor
-from vm_monitor.memory_monitor import MemoryMonitor
-from vm_monitor.disk_monitor import DiskMonitor
-from vm_monitor.iptables_monitor import IptablesMonitor
-from vm_monitor.user_monitor import UsersMonitor
-from vm_monitor.file_monitor import FileIntegrityMonitor
-from vm_monitor.ssh_monitor import SSHMonitor
+from vm_monitor import log_utils
+from vm_monitor.registry import MonitorRegistry
+from vm_monitor.proc_snapshot import ProcSnapshotCollector
+from vm_monitor.alert_manager import AlertManager
 
 
 class Monitor:
     def __init__(self, config_file: str = "config.json"):
         """
         Initialize the Monitor class.
+        Only the enabled monitors are imported and constructed; one that fails to initialise is skipped.
 
         Args:
             config_file (str): Path to the configuration file.
@@ -23,66 +20,60 @@ class Monitor:
         self.check_interval = self.config.get("check_interval", 60)
         self.logger = log_utils.configure_logging()
 
-        self.service_monitor = service_monitor.ServiceMonitor(config=self.config)
-        self.iptables_monitor = IptablesMonitor(config=self.config)
-        self.users_monitor = UsersMonitor(config=self.config)
-        self.memory_monitor = MemoryMonitor(config=self.config)
-        self.disk_monitor = DiskMonitor(config=self.config)
-        self.cpu_monitor = CPUMonitor(config=self.config)
-        self.file_monitor = FileIntegrityMonitor(config=self.config)
-        self.ssh_monitor = SSHMonitor(config=self.config)
+        # Shared services are created the first time an enabled monitor asks for them
+        self.alert_manager = None
+        self.snapshot_collector = None
+
+        self.registry = MonitorRegistry(self.config)
+        self.monitors = self.registry.create_enabled({
+            "alert_manager": self.get_alert_manager,
+            "snapshot_source": self.get_snapshot_collector,
+        })
+        self.logger.info(f"Initialised monitors: {', '.join(self.monitors) or 'none'}")
 
     def load_config(self, config_file: str) -> dict:
         with open(config_file, "r") as f:
             return json.load(f)
 
-    def start_cpu_monitor(self):
-        while True:
-            self.cpu_monitor.check_cpu_usage()
-            time.sleep(self.check_interval)
-
-    def start_memory_monitor(self):
-        while True:
-            self.memory_monitor.check_memory_usage()
-            time.sleep(self.check_interval)
-    
-    def start_file_monitor(self):
-        while True:
-            self.file_monitor.monitor_files()
-            time.sleep(self.check_interval)
-
-    def start_disk_monitor(self):
-        while True:
-            self.disk_monitor.check_disk_usage()
-            time.sleep(self.check_interval)
+    def get_alert_manager(self) -> AlertManager:
+        # One alert manager deduplicates and rate limits alerts from every monitor
+        if self.alert_manager is None:
+            self.alert_manager = AlertManager(config=self.config)
+        return self.alert_manager
 
-    def start_ssh_monitor(self):
-        while True:
-            self.ssh_monitor.monitor_ssh_failures()
-            time.sleep(self.check_interval)
+    def get_snapshot_collector(self) -> ProcSnapshotCollector:
+        # One collector reads /proc per tick; resource monitors consume its snapshots
+        if self.snapshot_collector is None:
+            self.snapshot_collector = ProcSnapshotCollector(config=self.config)
+            self.snapshot_collector.collect()
+        return self.snapshot_collector
 
-    def start_iptables_monitor(self):
-        while True:
-            self.iptables_monitor.monitor_iptables()
-            time.sleep(self.check_interval)
+    def run_monitor(self, name: str, monitor) -> None:
+        """
+        Run a monitor's check at its own interval (or the global one) until the process exits.
 
-    def start_users_monitor(self):
+        Args:
+            name (str): The monitor name.
+            monitor: The monitor instance.
+        """
+        interval = getattr(monitor, "check_interval", self.check_interval)
         while True:
-            self.users_monitor.monitor_users()
-            time.sleep(self.check_interval)
+            try:
+                monitor.run_check()
+            except Exception as e:
+                self.logger.error(f"Error running monitor '{name}': {str(e)}")
+            time.sleep(interval)
 
     def start_all_monitors(self):
         """
         Start all monitors in separate threads.
         """
-        threading.Thread(target=self.start_cpu_monitor, daemon=True).start()
-        threading.Thread(target=self.start_disk_monitor, daemon=True).start()
-        threading.Thread(target=self.start_memory_monitor, daemon=True).start()
-        threading.Thread(target=self.service_monitor.start_monitoring, daemon=True).start()
-        threading.Thread(target=self.start_iptables_monitor, daemon=True).start()
-        threading.Thread(target=self.start_users_monitor, daemon=True).start()
-        threading.Thread(target=self.start_file_monitor, daemon=True).start()
-        threading.Thread(target=self.start_ssh_monitor, daemon=True).start()
+        if self.snapshot_collector is not None:
+            threading.Thread(target=self.snapshot_collector.run, daemon=True).start()
+        if self.alert_manager is not None:
+            threading.Thread(target=self.alert_manager.run, daemon=True).start()
+        for name, monitor in self.monitors.items():
+            threading.Thread(target=self.run_monitor, args=(name, monitor), name=f"monitor-{name}", daemon=True).start()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,268 @@
+import os
+import time
+import threading
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DiskIOStats:
+    """
+    Cumulative I/O counters for a single block device, as read from /proc/diskstats.
+    """
+    reads: int
+    read_sectors: int
+    writes: int
+    write_sectors: int
+    busy_ms: int
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """
+    Immutable view of the system state captured during a single collector tick.
+
+    All resource monitors read from the same snapshot instead of querying the
+    kernel on their own.
+    """
+    timestamp: float
+    cpu_percent: float | None
+    memory_percent: float | None
+    memory_total: int
+    memory_available: int
+    load_average: tuple
+    disk_usage: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    disk_io: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    mounts: tuple = ()
+
+
+class _ProcFile:
+    """
+    A /proc file kept open between ticks and read into a reusable buffer.
+    """
+
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self.fd = None
+        self.buffer = bytearray(size)
+
+    def read(self) -> bytes:
+        """
+        Re-read the whole file from offset zero.
+
+        Returns:
+            bytes: The current content of the file.
+        """
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_RDONLY)
+        os.lseek(self.fd, 0, os.SEEK_SET)
+        view = memoryview(self.buffer)
+        length = 0
+        while True:
+            if length == len(self.buffer):
+                # The file outgrew the buffer; double it and keep reading.
+                view.release()
+                self.buffer.extend(bytes(len(self.buffer)))
+                view = memoryview(self.buffer)
+            count = os.readv(self.fd, [view[length:]])
+            if count == 0:
+                break
+            length += count
+        # Copy the filled part out of the buffer exactly once
+        data = view[:length].tobytes()
+        view.release()
+        return data
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class ProcSnapshotCollector:
+    def __init__(self, config: dict, proc_root: str = "/proc"):
+        """
+        Initialize the shared /proc snapshot collector.
+
+        Args:
+            config (dict): Configuration dictionary for snapshot settings.
+            proc_root (str): Mount point of procfs, overridable for tests.
+        """
+        self.logger = logger
+        self.interval = config.get("snapshot_interval", config.get("check_interval", 60))
+        self.disk_paths = config.get("disk_paths", ["/"])
+
+        self._stat = _ProcFile(os.path.join(proc_root, "stat"))
+        self._meminfo = _ProcFile(os.path.join(proc_root, "meminfo"))
+        self._diskstats = _ProcFile(os.path.join(proc_root, "diskstats"))
+        self._loadavg = _ProcFile(os.path.join(proc_root, "loadavg"))
+        self._mounts = _ProcFile(os.path.join(proc_root, "self", "mounts"))
+
+        self._previous_cpu = None
+        self._latest = None
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self) -> SystemSnapshot | None:
+        """
+        The most recently published snapshot, or None before the first tick.
+        """
+        return self._latest
+
+    def fresh(self, now: float | None = None) -> SystemSnapshot | None:
+        """
+        The latest snapshot if it was taken within two collection intervals.
+        An older one means collection is failing or not running, and consumers should read the kernel directly.
+
+        Returns:
+            SystemSnapshot: The latest snapshot, or None if there is none or it is stale.
+        """
+        snapshot = self._latest
+        if snapshot is None:
+            return None
+        if (time.time() if now is None else now) - snapshot.timestamp > 2 * self.interval:
+            return None
+        return snapshot
+
+    def _read_cpu_percent(self) -> float | None:
+        """
+        Compute the CPU utilisation since the previous tick from /proc/stat.
+
+        Returns:
+            float: Busy percentage, or None on the first tick.
+        """
+        first_line = self._stat.read().split(b"\n", 1)[0]
+        # user nice system idle iowait irq softirq steal (guest time is already in user)
+        values = [int(value) for value in first_line.split()[1:9]]
+        total = sum(values)
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+
+        previous = self._previous_cpu
+        self._previous_cpu = (total, idle)
+        if previous is None:
+            return None
+        total_delta = total - previous[0]
+        if total_delta <= 0:
+            return 0.0
+        busy_delta = total_delta - (idle - previous[1])
+        return round(max(0.0, min(100.0, busy_delta * 100.0 / total_delta)), 1)
+
+    def _read_memory(self) -> tuple[int, int, float | None]:
+        """
+        Parse MemTotal and MemAvailable from /proc/meminfo.
+
+        Returns:
+            tuple: Total bytes, available bytes and used percentage.
+        """
+        total = available = 0
+        for line in self._meminfo.read().splitlines():
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1]) * 1024
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1]) * 1024
+                break
+        if total == 0:
+            return total, available, None
+        return total, available, round((total - available) * 100.0 / total, 1)
+
+    def _read_disk_io(self) -> dict:
+        """
+        Parse per-device counters from /proc/diskstats.
+
+        Returns:
+            dict: Device name mapped to its DiskIOStats.
+        """
+        disk_io = {}
+        for line in self._diskstats.read().splitlines():
+            fields = line.split()
+            if len(fields) < 13:
+                continue
+            disk_io[fields[2].decode()] = DiskIOStats(
+                reads=int(fields[3]),
+                read_sectors=int(fields[5]),
+                writes=int(fields[7]),
+                write_sectors=int(fields[9]),
+                busy_ms=int(fields[12]),
+            )
+        return disk_io
+
+    def _read_load_average(self) -> tuple:
+        fields = self._loadavg.read().split()
+        return tuple(float(value) for value in fields[:3])
+
+    def _read_mounts(self) -> tuple:
+        """
+        Parse the mount table.
+
+        Returns:
+            tuple: (device, mount point, filesystem type) for every mount.
+        """
+        mounts = []
+        for line in self._mounts.read().splitlines():
+            fields = line.split()
+            if len(fields) >= 3:
+                mounts.append((fields[0].decode(), fields[1].decode(), fields[2].decode()))
+        return tuple(mounts)
+
+    def _read_disk_usage(self) -> dict:
+        """
+        Compute the used percentage of every configured disk path, matching psutil.disk_usage.
+
+        Returns:
+            dict: Path mapped to its used percentage.
+        """
+        usage = {}
+        for path in self.disk_paths:
+            try:
+                stats = os.statvfs(path)
+            except OSError as e:
+                self.logger.error(f"Failed to get disk usage for {path}: {e}")
+                continue
+            used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+            total_user = used + stats.f_bavail * stats.f_frsize
+            usage[path] = round(used * 100.0 / total_user, 1) if total_user else 0.0
+        return usage
+
+    def collect(self) -> SystemSnapshot:
+        """
+        Read every data source once and publish a new immutable snapshot.
+
+        Returns:
+            SystemSnapshot: The freshly published snapshot.
+        """
+        with self._lock:
+            memory_total, memory_available, memory_percent = self._read_memory()
+            snapshot = SystemSnapshot(
+                timestamp=time.time(),
+                cpu_percent=self._read_cpu_percent(),
+                memory_percent=memory_percent,
+                memory_total=memory_total,
+                memory_available=memory_available,
+                load_average=self._read_load_average(),
+                disk_usage=MappingProxyType(self._read_disk_usage()),
+                disk_io=MappingProxyType(self._read_disk_io()),
+                mounts=self._read_mounts(),
+            )
+            self._latest = snapshot
+            return snapshot
+
+    def run(self) -> None:
+        """
+        Continuously collect snapshots at the configured interval.
+        """
+        while True:
+            try:
+                self.collect()
+            except Exception as e:
+                self.logger.error(f"Error collecting system snapshot: {str(e)}")
+            time.sleep(self.interval)
+
+    def close(self) -> None:
+        """
+        Close all /proc file descriptors held by the collector.
+        """
+        for proc_file in (self._stat, self._meminfo, self._diskstats, self._loadavg, self._mounts):
+            proc_file.close()
@@ -0,0 +1,345 @@
+import os
+import errno
+import time
+import socket
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Netlink process connector constants (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+NLMSG_DONE = 3
+
+NLMSG_HEADER = struct.Struct("=IHHII")
+CN_MSG_HEADER = struct.Struct("=IIIIHH")
+PROC_EVENT_HEADER = struct.Struct("=IIQ")
+EXEC_EVENT = struct.Struct("=II")
+
+TCP_LISTEN_STATE = "0A"
+
+
+class ProcConnector:
+    def __init__(self):
+        """
+        Subscribe to process events through the netlink process connector.
+        Requires CAP_NET_ADMIN; raises OSError when the kernel refuses the subscription.
+        """
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((os.getpid(), CN_IDX_PROC))
+            self._send_op(PROC_CN_MCAST_LISTEN)
+        except OSError:
+            self.sock.close()
+            raise
+
+    def _send_op(self, op: int) -> None:
+        payload = struct.pack("=I", op)
+        cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        self.sock.send(header + cn_msg)
+
+    def read_exec_events(self) -> tuple[list[int], bool]:
+        """
+        Drain the events queued by the kernel since the last call without blocking.
+
+        Returns:
+            tuple: PIDs of processes that executed a new program, and whether the socket
+                buffer overflowed (ENOBUFS) so that some events were lost.
+        """
+        self.sock.setblocking(False)
+        pids = []
+        overflowed = False
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return pids, overflowed
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                # The kernel reports the overflow once; the events still queued can be read
+                overflowed = True
+                continue
+            pids.extend(self.parse_exec_events(data))
+
+    @staticmethod
+    def parse_exec_events(data: bytes) -> list[int]:
+        pids = []
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(data):
+            length = NLMSG_HEADER.unpack_from(data, offset)[0]
+            if length < NLMSG_HEADER.size:
+                break
+            event_offset = offset + NLMSG_HEADER.size + CN_MSG_HEADER.size
+            what = PROC_EVENT_HEADER.unpack_from(data, event_offset)[0]
+            if what == PROC_EVENT_EXEC:
+                pid, tgid = EXEC_EVENT.unpack_from(data, event_offset + PROC_EVENT_HEADER.size)
+                if pid == tgid:
+                    pids.append(pid)
+            offset += (length + 3) & ~3
+        return pids
+
+    def close(self) -> None:
+        try:
+            self._send_op(PROC_CN_MCAST_IGNORE)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class ProcessMonitor:
+    def __init__(self, config: dict, proc_root: str = "/proc"):
+        """
+        Initialize the ProcessMonitor class.
+
+        Args:
+            config (dict): Configuration dictionary for ProcessMonitor settings.
+            proc_root (str): Mount point of procfs, overridable for tests.
+        """
+        self.logger = logger
+        self.proc_root = proc_root
+        self.snapshot_file = os.path.join(config["log_directory"], config["process_monitor"]["snapshot_file"])
+        self.check_interval = config["process_monitor"]["check_interval"]
+        self.mode = config["process_monitor"].get("mode", "scan")
+
+        # pid -> (directory inode, starttime, name); the inode lets known PIDs be skipped without reading /proc/<pid>/stat
+        self.processes = {}
+        self.baseline_ready = False
+        self.connector = None
+
+        os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+        self.listening_sockets = self.load_listening_snapshot()
+        if self.listening_sockets is None:
+            self.logger.info(f"No listening sockets snapshot found at {self.snapshot_file}. Saving initial snapshot.")
+            self.listening_sockets = self.get_listening_sockets()
+            self.save_listening_snapshot()
+
+    def read_process_stat(self, pid: int) -> tuple[int, str] | None:
+        """
+        Read the start time and command name of a process.
+
+        Args:
+            pid (int): The process ID.
+
+        Returns:
+            tuple: (starttime in clock ticks, command name), or None if the process is gone.
+        """
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "stat"), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        # The command name may contain spaces or parentheses, so split on the last ')'
+        head, _, rest = data.rpartition(b")")
+        fields = rest.split()
+        if len(fields) < 20:
+            return None
+        return int(fields[19]), head.partition(b"(")[2].decode(errors="replace")
+
+    def read_cmdline(self, pid: int) -> str:
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "cmdline"), "rb") as f:
+                return f.read().rstrip(b"\0").replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            return ""
+
+    def scan_processes(self) -> tuple[list, list]:
+        """
+        Incrementally scan /proc for started and exited processes.
+        Only PIDs that are new, or whose /proc directory changed, have their stat file parsed.
+
+        Returns:
+            tuple: Lists of (pid, starttime, name) for started and exited processes.
+        """
+        current = {}
+        started = []
+        previous = self.processes
+        with os.scandir(self.proc_root) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.isdigit():
+                    continue
+                pid = int(name)
+                inode = entry.inode()
+                known = previous.get(pid)
+                if known is not None and known[0] == inode:
+                    current[pid] = known
+                    continue
+                stat = self.read_process_stat(pid)
+                if stat is None:
+                    continue
+                starttime, comm = stat
+                current[pid] = (inode, starttime, comm)
+                if known is None or known[1] != starttime:
+                    started.append((pid, starttime, comm))
+
+        # A reused PID with a different start time means the old process exited
+        exited = [
+            (pid, info[1], info[2])
+            for pid, info in previous.items()
+            if pid not in current or current[pid][1] != info[1]
+        ]
+        self.processes = current
+        return started, exited
+
+    def get_listening_sockets(self) -> set:
+        """
+        Parse /proc/net/tcp and /proc/net/tcp6 for sockets in the LISTEN state.
+
+        Returns:
+            set: (protocol, address, port) tuples.
+        """
+        sockets = set()
+        for protocol, family in (("tcp", socket.AF_INET), ("tcp6", socket.AF_INET6)):
+            try:
+                with open(os.path.join(self.proc_root, "net", protocol), "r") as f:
+                    lines = f.readlines()[1:]
+            except OSError:
+                continue
+            for line in lines:
+                fields = line.split()
+                if len(fields) < 4 or fields[3] != TCP_LISTEN_STATE:
+                    continue
+                address_hex, port_hex = fields[1].split(":")
+                raw = bytes.fromhex(address_hex)
+                # The kernel prints each 32-bit word of the address in host (little-endian) order
+                raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+                sockets.add((protocol, socket.inet_ntop(family, raw), int(port_hex, 16)))
+        return sockets
+
+    def load_listening_snapshot(self) -> set | None:
+        """
+        Load the baseline of listening sockets from the snapshot file.
+
+        Returns:
+            set: (protocol, address, port) tuples, or None if there is no snapshot yet.
+        """
+        if not os.path.exists(self.snapshot_file):
+            return None
+        sockets = set()
+        try:
+            with open(self.snapshot_file, "r") as f:
+                for line in f:
+                    protocol, address, port = line.strip().rsplit(",", 2)
+                    sockets.add((protocol, address, int(port)))
+        except Exception as e:
+            self.logger.error(f"Error loading listening sockets snapshot: {str(e)}")
+        return sockets
+
+    def save_listening_snapshot(self) -> None:
+        try:
+            with open(self.snapshot_file, "w") as f:
+                for protocol, address, port in sorted(self.listening_sockets):
+                    f.write(f"{protocol},{address},{port}\n")
+        except Exception as e:
+            self.logger.error(f"Error saving listening sockets snapshot to {self.snapshot_file}: {str(e)}")
+
+    def compare_listening_sockets(self) -> bool:
+        """
+        Compare the current listening sockets with the baseline and log changes.
+
+        Returns:
+            bool: True if there are changes, False otherwise.
+        """
+        current = self.get_listening_sockets()
+        opened = current - self.listening_sockets
+        closed = self.listening_sockets - current
+
+        for protocol, address, port in sorted(opened):
+            self.logger.warning(f"New listening socket detected: {protocol} {address}:{port}")
+        for protocol, address, port in sorted(closed):
+            self.logger.info(f"Listening socket closed: {protocol} {address}:{port}")
+
+        if opened or closed:
+            self.listening_sockets = current
+            self.save_listening_snapshot()
+            return True
+        return False
+
+    def check_processes(self) -> None:
+        """
+        Scan processes once and log every process started since the previous scan.
+        The first scan only records the baseline.
+        """
+        started, exited = self.scan_processes()
+        if not self.baseline_ready:
+            self.baseline_ready = True
+            self.logger.info(f"Recorded process baseline with {len(self.processes)} processes.")
+            return
+        for pid, _, comm in started:
+            self.report_process(pid, comm)
+        if exited:
+            self.logger.debug(f"{len(exited)} processes exited since the last scan.")
+
+    def report_process(self, pid: int, comm: str) -> None:
+        self.logger.info(f"New process detected: PID={pid}, Name={comm}, Command={self.read_cmdline(pid)}")
+
+    def get_connector(self) -> ProcConnector | None:
+        """
+        Open the netlink process connector on first use in "netlink" mode.
+
+        Returns:
+            ProcConnector: The active subscription, or None when scanning /proc instead.
+        """
+        if self.mode != "netlink" or self.connector is not None:
+            return self.connector
+        try:
+            self.connector = ProcConnector()
+        except OSError as e:
+            self.logger.error(f"Process connector unavailable, falling back to /proc scanning: {str(e)}")
+            self.mode = "scan"
+            return None
+        # Baseline for the rescan that recovers events lost to a socket buffer overflow
+        self.check_processes()
+        return self.connector
+
+    def check_exec_events(self, connector: ProcConnector) -> None:
+        """
+        Report every exec event the kernel queued since the previous check.
+
+        Args:
+            connector (ProcConnector): An active process connector subscription.
+        """
+        pids, overflowed = connector.read_exec_events()
+        for pid in pids:
+            stat = self.read_process_stat(pid)
+            # Short-lived processes may be gone before the queued event is read
+            self.report_process(pid, stat[1] if stat is not None else "<exited>")
+            if stat is not None:
+                # Known to the recovery rescan, so it is not reported twice
+                try:
+                    self.processes[pid] = (os.stat(os.path.join(self.proc_root, str(pid))).st_ino, *stat)
+                except OSError:
+                    pass
+        if overflowed:
+            self.logger.warning("Process connector dropped events; rescanning /proc for unreported processes.")
+            self.check_processes()
+
+    def run_check(self) -> None:
+        """
+        Check processes and listening sockets once.
+        """
+        connector = self.get_connector()
+        if connector is not None:
+            self.check_exec_events(connector)
+        else:
+            self.check_processes()
+        self.compare_listening_sockets()
+
+    def monitor_processes(self) -> None:
+        """
+        Continuously monitor processes and listening sockets for changes.
+        Uses the netlink process connector in "netlink" mode and falls back to /proc scanning.
+        """
+        while True:
+            try:
+                self.run_check()
+            except Exception as e:
+                self.logger.error(f"Error while monitoring processes: {str(e)}")
+            time.sleep(self.check_interval)
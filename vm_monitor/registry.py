@@ -0,0 +1,114 @@
+import inspect
+import logging
+import importlib
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "vm_monitor.monitors"
+
+# Built-in monitors as "module:Class" strings so nothing is imported until a monitor is enabled
+BUILTIN_MONITORS = {
+    "cpu": "vm_monitor.cpu_monitor:CPUMonitor",
+    "memory": "vm_monitor.memory_monitor:MemoryMonitor",
+    "disk": "vm_monitor.disk_monitor:DiskMonitor",
+    "services": "vm_monitor.service_monitor:ServiceMonitor",
+    "iptables": "vm_monitor.iptables_monitor:IptablesMonitor",
+    "users": "vm_monitor.user_monitor:UsersMonitor",
+    "files": "vm_monitor.file_monitor:FileIntegrityMonitor",
+    "ssh": "vm_monitor.ssh_monitor:SSHMonitor",
+    "processes": "vm_monitor.process_monitor:ProcessMonitor",
+}
+
+
+class MonitorRegistry:
+    def __init__(self, config: dict):
+        """
+        Resolve which monitors to run and construct them on demand.
+
+        Monitors come from the built-in table, the "monitors.plugins" config section
+        ({"name": "module:Class"}) and the "vm_monitor.monitors" entry point group.
+        A monitor class takes the configuration dict as `config`, may accept any of the
+        shared services by keyword (e.g. `alert_manager`, `snapshot_source`) and must
+        provide a `run_check()` method.
+
+        Args:
+            config (dict): Agent configuration; "monitors.enabled" lists the monitors to run.
+        """
+        self.logger = logger
+        self.config = config
+        monitors_config = config.get("monitors", {})
+        self.targets = dict(BUILTIN_MONITORS)
+        self.targets.update(monitors_config.get("plugins", {}))
+        self.enabled = monitors_config.get("enabled", list(BUILTIN_MONITORS))
+        self._entry_points = None
+
+    def entry_points(self) -> dict:
+        """
+        Return the monitors advertised by installed packages.
+        Package metadata is only scanned the first time an unknown monitor name is requested.
+
+        Returns:
+            dict: Monitor name mapped to its (not yet loaded) entry point.
+        """
+        if self._entry_points is None:
+            # importlib.metadata is slow to import, so keep it off the startup path
+            from importlib.metadata import entry_points
+            self._entry_points = {entry.name: entry for entry in entry_points(group=ENTRY_POINT_GROUP)}
+        return self._entry_points
+
+    def load_class(self, name: str) -> type:
+        """
+        Import the class implementing a monitor.
+
+        Args:
+            name (str): The monitor name.
+
+        Returns:
+            type: The monitor class.
+        """
+        target = self.targets.get(name)
+        if target is None:
+            entry = self.entry_points().get(name)
+            if entry is None:
+                raise LookupError(f"Unknown monitor: {name}")
+            return entry.load()
+        module_name, _, class_name = target.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def create(self, name: str, services: dict):
+        """
+        Import and construct one monitor. Failures are logged and isolated to that monitor.
+
+        Args:
+            name (str): The monitor name.
+            services (dict): Shared service name mapped to a zero-argument callable returning it.
+                Only the services the constructor accepts are created and passed.
+
+        Returns:
+            The monitor instance, or None if it could not be loaded or initialised.
+        """
+        try:
+            monitor_class = self.load_class(name)
+            parameters = inspect.signature(monitor_class).parameters
+            kwargs = {service: factory() for service, factory in services.items() if service in parameters}
+            return monitor_class(config=self.config, **kwargs)
+        except Exception as e:
+            self.logger.error(f"Failed to initialise monitor '{name}', skipping it: {type(e).__name__}: {str(e)}")
+            return None
+
+    def create_enabled(self, services: dict) -> dict:
+        """
+        Construct every enabled monitor, skipping the ones that fail.
+
+        Args:
+            services (dict): Shared services, see create().
+
+        Returns:
+            dict: Monitor name mapped to its instance.
+        """
+        monitors = {}
+        for name in self.enabled:
+            monitor = self.create(name, services)
+            if monitor is not None:
+                monitors[name] = monitor
+        return monitors
@@ -1,22 +1,26 @@
 import os
 import time
 import threading
-import subprocess
-from log_utils import configure_logging
+import logging
+from transport import LocalTransport
+from log_utils import host_logger
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class ServiceMonitor:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, transport=None):
         """
         Initialize the ServiceMonitor class.
 
         Args:
             config (dict): Configuration dictionary for ServiceMonitor settings.
+            transport (Transport): Where to run commands, defaults to the local machine.
         """
-        self.logger = logger
+        self.transport = transport or LocalTransport()
+        self.logger = host_logger(logger, self.transport)
         self.whitelist_file = os.path.join(config["log_directory"], config["service_monitor"]["whitelist_file"])
         self.check_interval = config["service_monitor"]["check_interval"]
+        self.command_timeout = config.get("command_timeout", 30)
         self.whitelisted_services = self.load_whitelist()
 
     def load_whitelist(self):
@@ -42,7 +46,7 @@ class ServiceMonitor:
             list[str]: List of active service names.
         """
         try:
-            result = subprocess.run(['systemctl', 'list-units', '--type=service', '--state=running'], stdout=subprocess.PIPE)
+            result = self.transport.run(['systemctl', 'list-units', '--type=service', '--state=running'], timeout=self.command_timeout)
             services = result.stdout.decode('utf-8').splitlines()
             active_services = [line.split()[0] for line in services if '.service' in line]
             return active_services
@@ -50,6 +54,24 @@ class ServiceMonitor:
             self.logger.error(f"Error retrieving active services: {str(e)}")
             return []
 
+    def run_check(self):
+        """
+        Checks the active services once and whitelists any new ones.
+        """
+        active_services = self.get_active_services()
+        new_services_detected = False
+
+        for service in active_services:
+            if service not in self.whitelisted_services:
+                self.logger.warning(f"New service detected: {service}")
+                self.whitelisted_services.append(service)
+                self.update_whitelist_file(service)
+                new_services_detected = True
+
+        # Log if no new services were detected
+        if not new_services_detected:
+            self.logger.info("No new services detected. All active services are in the whitelist.")
+
     def monitor_services(self):
         """
         Monitors services to detect any new ones not in the whitelist.
@@ -57,20 +79,7 @@ class ServiceMonitor:
         """
         while True:
             try:
-                active_services = self.get_active_services()
-                new_services_detected = False
-                
-                for service in active_services:
-                    if service not in self.whitelisted_services:
-                        self.logger.warning(f"New service detected: {service}")
-                        self.whitelisted_services.append(service)
-                        self.update_whitelist_file(service)
-                        new_services_detected = True
-                
-                # Log if no new services were detected
-                if not new_services_detected:
-                    self.logger.info("No new services detected. All active services are in the whitelist.")
-                
+                self.run_check()
                 time.sleep(self.check_interval)
             except Exception as e:
                 self.logger.error(f"Error while monitoring services: {str(e)}")
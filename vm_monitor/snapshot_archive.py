@@ -0,0 +1,428 @@
+import os
+import re
+import json
+import time
+import zlib
+import difflib
+import logging
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BASE = "base"
+DELTA = "delta"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd compressed archive records")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def fsync_path(path: str) -> None:
+    """
+    Flush a file, or a directory's entries, to disk.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def make_delta(old_lines: list[str], new_lines: list[str]) -> list:
+    """
+    Encode new_lines as line ranges copied from old_lines plus inserted text.
+
+    Returns:
+        list: Operations, either ["c", start, end] (copy old_lines[start:end]) or ["i", text].
+    """
+    operations = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append(["c", i1, i2])
+        elif j2 > j1:
+            operations.append(["i", "".join(new_lines[j1:j2])])
+    return operations
+
+
+def apply_delta(old_lines: list[str], operations: list) -> str:
+    parts = []
+    for operation in operations:
+        if operation[0] == "c":
+            parts.extend(old_lines[operation[1]:operation[2]])
+        else:
+            parts.append(operation[1])
+    return "".join(parts)
+
+
+class SnapshotArchive:
+    def __init__(self, directory: str, name: str, settings: dict | None = None):
+        """
+        Versioned history of a text snapshot. Versions are appended to a data file
+        as compressed full copies (bases) or line deltas against the previous version,
+        and `<name>.index` records where each one lives, so any version can be rebuilt
+        from its nearest base without reading the rest of the archive.
+        Compaction writes a new generation of the data file under a new name and then
+        atomically replaces the index, so the index never points into a file it was not written for.
+
+        Args:
+            directory (str): Directory holding the archive files.
+            name (str): Name of the archive, e.g. the monitor it belongs to.
+            settings (dict): Optional "keyframe_interval", "keep_versions", "max_age_days",
+                "maintenance_interval" (seconds between age checks) and "compression".
+        """
+        settings = settings or {}
+        self.logger = logger
+        self.directory = directory
+        self.name = name
+        self.index_file = os.path.join(directory, f"{name}.index")
+        self.generation = 0
+        self.keyframe_interval = settings.get("keyframe_interval", 20)
+        self.keep_versions = settings.get("keep_versions", 500)
+        self.max_age_days = settings.get("max_age_days")
+        self.maintenance_interval = settings.get("maintenance_interval", 3600)
+        self._next_maintenance = 0.0
+        self.codec = settings.get("compression", "zlib")
+        if self.codec == "zstd" and zstandard is None:
+            self.logger.warning("zstandard is not installed; compressing snapshot archive with zlib.")
+            self.codec = "zlib"
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.index = self.load_index()
+        self.remove_stale_data_files()
+        self._latest = None
+
+    def data_path(self, generation: int) -> str:
+        suffix = "archive" if generation == 0 else f"{generation}.archive"
+        return os.path.join(self.directory, f"{self.name}.{suffix}")
+
+    @property
+    def data_file(self) -> str:
+        return self.data_path(self.generation)
+
+    def load_index(self) -> list[dict]:
+        """
+        Read the index, dropping entries whose data was never fully written.
+        """
+        if not os.path.exists(self.index_file):
+            return []
+        index = []
+        size = None
+        try:
+            with open(self.index_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if size is None:
+                        self.generation = entry.get("generation", 0)
+                        size = os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
+                    if entry.get("generation", 0) != self.generation or entry["offset"] + entry["length"] > size:
+                        break
+                    index.append(entry)
+        except Exception as e:
+            self.logger.error(f"Error loading snapshot archive index {self.index_file}: {str(e)}")
+        return index
+
+    def remove_stale_data_files(self) -> None:
+        """
+        Delete data files of other generations, left behind by a compaction that was interrupted.
+        """
+        pattern = re.compile(rf"{re.escape(self.name)}\.(\d+\.)?archive")
+        for entry in os.scandir(self.directory):
+            if pattern.fullmatch(entry.name) and entry.path != self.data_file:
+                try:
+                    os.remove(entry.path)
+                except OSError as e:
+                    self.logger.error(f"Error removing stale snapshot archive {entry.path}: {str(e)}")
+
+    def read_record(self, f, entry: dict):
+        f.seek(entry["offset"])
+        payload = decompress(f.read(entry["length"]), entry["codec"]).decode('utf-8')
+        return payload if entry["kind"] == BASE else json.loads(payload)
+
+    def _position(self, version: int) -> int:
+        for position in range(len(self.index) - 1, -1, -1):
+            if self.index[position]["version"] == version:
+                return position
+        raise KeyError(f"Version {version} is not in {self.data_file}")
+
+    def _rebuild(self, position: int) -> str:
+        # Walk back to the nearest base, then replay the deltas up to the requested version
+        start = position
+        while self.index[start]["kind"] != BASE:
+            start -= 1
+        with open(self.data_file, 'rb') as f:
+            content = self.read_record(f, self.index[start])
+            for entry in self.index[start + 1:position + 1]:
+                content = apply_delta(content.splitlines(keepends=True), self.read_record(f, entry))
+        return content
+
+    def _iterate(self, first: int, last: int):
+        """
+        Yield (entry, content) for index positions first..last, decoding each record once.
+        """
+        if first > last:
+            return
+        content = self._rebuild(first)
+        yield self.index[first], content
+        with open(self.data_file, 'rb') as f:
+            for entry in self.index[first + 1:last + 1]:
+                record = self.read_record(f, entry)
+                content = record if entry["kind"] == BASE else apply_delta(content.splitlines(keepends=True), record)
+                yield entry, content
+
+    def latest(self) -> str | None:
+        with self._lock:
+            if not self.index:
+                return None
+            if self._latest is None:
+                self._latest = self._rebuild(len(self.index) - 1)
+            return self._latest
+
+    def _append(self, content: str, version: int, timestamp: float, previous: str | None, since_base: int,
+                index_file: str | None = None) -> None:
+        if previous is None or since_base >= self.keyframe_interval:
+            kind, payload = BASE, content
+        else:
+            kind = DELTA
+            payload = json.dumps(make_delta(previous.splitlines(keepends=True), content.splitlines(keepends=True)))
+        record = compress(payload.encode('utf-8'), self.codec)
+        with open(self.data_file, 'ab') as f:
+            offset = f.tell()
+            f.write(record)
+        entry = {"version": version, "timestamp": timestamp, "kind": kind, "generation": self.generation,
+                 "offset": offset, "length": len(record), "codec": self.codec}
+        with open(index_file or self.index_file, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+        self.index.append(entry)
+
+    def _since_base(self) -> int:
+        count = 0
+        for entry in reversed(self.index):
+            if entry["kind"] == BASE:
+                return count
+            count += 1
+        return count
+
+    def add(self, content: str, timestamp: float | None = None) -> int | None:
+        """
+        Record a new version of the snapshot unless it is identical to the latest one.
+
+        Args:
+            content (str): The snapshot text.
+            timestamp (float): When the snapshot was taken, defaults to now.
+
+        Returns:
+            int: The new version number, or None if nothing changed.
+        """
+        self.maintain()
+        previous = self.latest()
+        if content == previous:
+            return None
+        with self._lock:
+            version = self.index[-1]["version"] + 1 if self.index else 1
+            self._append(content, version, time.time() if timestamp is None else timestamp, previous, self._since_base() + 1)
+            self._latest = content
+            # Compact in batches rather than on every version past the limit
+            if len(self.index) >= self.keep_versions + self.keyframe_interval:
+                self._prune()
+            return version
+
+    def maintain(self) -> None:
+        """
+        Apply the age policy if it has not been checked within maintenance_interval.
+        Called on every add(), and by monitors on every check, so versions expire even on hosts that rarely change.
+        """
+        if self.max_age_days is None or time.monotonic() < self._next_maintenance:
+            return
+        with self._lock:
+            self._next_maintenance = time.monotonic() + self.maintenance_interval
+            cutoff = time.time() - self.max_age_days * 86400
+            if len(self.index) > 1 and self.index[0]["timestamp"] < cutoff:
+                self._prune()
+
+    def prune(self, now: float | None = None) -> int:
+        """
+        Apply the retention policy now.
+
+        Returns:
+            int: Number of versions removed.
+        """
+        with self._lock:
+            return self._prune(now)
+
+    def _prune(self, now: float | None = None) -> int:
+        keep = self.index[-self.keep_versions:] if self.keep_versions else list(self.index)
+        if self.max_age_days is not None:
+            cutoff = (time.time() if now is None else now) - self.max_age_days * 86400
+            # The latest version describes the current state and is always kept
+            keep = [entry for entry in keep if entry["timestamp"] >= cutoff] or keep[-1:]
+        removed = len(self.index) - len(keep)
+        if removed:
+            self._compact(self._position(keep[0]["version"]))
+            self.logger.info(f"Removed {removed} old versions from {self.data_file}.")
+        return removed
+
+    def _compact(self, first: int) -> None:
+        """
+        Rewrite the archive so it starts at index position `first`, with that version as a new base.
+        The retained versions go to the next generation's data file and a temporary index; replacing
+        the index is the single step that switches generations, so a crash at any point leaves a
+        consistent archive. Both new files are flushed to disk before the switch and the directory
+        after it, so a power loss cannot leave the new index pointing at unwritten data.
+        """
+        retained = [(entry["version"], entry["timestamp"], content)
+                    for entry, content in self._iterate(first, len(self.index) - 1)]
+        old_data_file, old_index, old_generation = self.data_file, self.index, self.generation
+        temporary_index = f"{self.index_file}.tmp"
+        self.generation, self.index = old_generation + 1, []
+        try:
+            for path in (self.data_file, temporary_index):
+                if os.path.exists(path):
+                    os.remove(path)
+            previous = None
+            for version, timestamp, content in retained:
+                self._append(content, version, timestamp, previous, self._since_base() + 1, index_file=temporary_index)
+                previous = content
+            fsync_path(self.data_file)
+            fsync_path(temporary_index)
+            os.replace(temporary_index, self.index_file)
+        except Exception:
+            if os.path.exists(self.data_file):
+                os.remove(self.data_file)
+            self.generation, self.index = old_generation, old_index
+            raise
+        try:
+            fsync_path(self.directory)
+        except OSError as e:
+            self.logger.error(f"Error flushing snapshot archive directory {self.directory}: {str(e)}")
+        try:
+            os.remove(old_data_file)
+        except OSError as e:
+            # Harmless: stale generations are removed the next time the archive is opened
+            self.logger.error(f"Error removing old snapshot archive {old_data_file}: {str(e)}")
+
+    def versions(self) -> list[tuple[int, float]]:
+        """
+        Returns:
+            list[tuple[int, float]]: (version, timestamp) of every stored version, oldest first.
+        """
+        with self._lock:
+            return [(entry["version"], entry["timestamp"]) for entry in self.index]
+
+    def get(self, version: int) -> str:
+        """
+        Return the snapshot as it was stored in a given version.
+
+        Raises:
+            KeyError: If the version is not (or no longer) in the archive.
+        """
+        with self._lock:
+            return self._rebuild(self._position(version))
+
+    def version_at(self, timestamp: float) -> int | None:
+        """
+        Return the version that was current at a point in time, or None if the archive starts later.
+        """
+        with self._lock:
+            current = None
+            for entry in self.index:
+                if entry["timestamp"] > timestamp:
+                    break
+                current = entry["version"]
+            return current
+
+    def at(self, timestamp: float) -> str | None:
+        """
+        Return the snapshot as it was at a point in time, or None if the archive starts later.
+        """
+        version = self.version_at(timestamp)
+        return None if version is None else self.get(version)
+
+    def diff(self, old_version: int, new_version: int) -> str:
+        """
+        Return a unified diff between two versions.
+        """
+        old, new = self.get(old_version), self.get(new_version)
+        return "".join(difflib.unified_diff(
+            old.splitlines(keepends=True), new.splitlines(keepends=True),
+            fromfile=f"version {old_version}", tofile=f"version {new_version}",
+        ))
+
+    def report(self, since: float | None = None, until: float | None = None) -> list[dict]:
+        """
+        Diff every consecutive pair of versions recorded in a time range, decoding each record only once.
+
+        Args:
+            since (float): Start of the range; the version current at that time is the first baseline.
+            until (float): End of the range, defaults to now.
+
+        Returns:
+            list[dict]: One {"version", "timestamp", "diff"} per change, oldest first.
+        """
+        with self._lock:
+            if not self.index:
+                return []
+            first = 0
+            if since is not None:
+                first = max([p for p, entry in enumerate(self.index) if entry["timestamp"] <= since], default=0)
+            last = len(self.index) - 1
+            if until is not None:
+                last = max([p for p, entry in enumerate(self.index) if entry["timestamp"] <= until], default=-1)
+
+            changes, previous = [], None
+            for entry, content in self._iterate(first, last):
+                if previous is not None:
+                    changes.append({
+                        "version": entry["version"],
+                        "timestamp": entry["timestamp"],
+                        "diff": "".join(difflib.unified_diff(
+                            previous[1].splitlines(keepends=True), content.splitlines(keepends=True),
+                            fromfile=f"version {previous[0]}", tofile=f"version {entry['version']}",
+                        )),
+                    })
+                previous = (entry["version"], content)
+            return changes
+
+
+def open_archive(config: dict, name: str, seed_file: str | None = None, normalize=None) -> SnapshotArchive | None:
+    """
+    Open the history archive for a monitor if the "snapshot_archive" section enables it.
+
+    Args:
+        config (dict): Agent configuration.
+        name (str): Archive name, e.g. "iptables".
+        seed_file (str): Snapshot file recorded as the first version when the archive is empty.
+        normalize (callable): Applied to the seed file's content, matching what the monitor archives.
+
+    Returns:
+        SnapshotArchive: The archive, or None when archiving is disabled.
+    """
+    settings = config.get("snapshot_archive", {})
+    if not settings.get("enabled", False):
+        return None
+    directory = os.path.join(config["log_directory"], settings.get("directory", "archive"))
+    archive = SnapshotArchive(directory, name, settings)
+    if seed_file and not archive.index and os.path.exists(seed_file):
+        with open(seed_file, 'r') as f:
+            content = f.read()
+        archive.add(normalize(content) if normalize else content, timestamp=os.path.getmtime(seed_file))
+    return archive
@@ -1,54 +1,124 @@
 import os
 import re
 import time
+import shutil
+import logging
 from collections import defaultdict
-from log_utils import configure_logging
+from alert_manager import AlertManager
+from journal_source import JournalAuthSource
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class SSHMonitor:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, alert_manager=None):
         """
         Initialize the SSH Monitor.
 
         Args:
             config (dict): Configuration dictionary for SSHMonitor settings.
+            alert_manager (AlertManager): Shared alert manager, a private one is created if omitted.
         """
         self.logger = logger
+        self.alerts = alert_manager or AlertManager(config)
         self.log_file = config["ssh_monitor"]["log_file"]
         self.check_interval = config["ssh_monitor"]["check_interval"]
         self.max_failures = config["ssh_monitor"]["max_failures"]
+        # An IP quiet for this long is forgotten and its alert expires, so a later attack is a new incident
+        self.alert_expiry = config["ssh_monitor"].get("alert_expiry", 3600)
         self.fail_pattern = re.compile(r"Failed password for (?P<user>\S+) from (?P<ip>\d+\.\d+\.\d+\.\d+)")
         self.failures = defaultdict(int)
+        self.last_failure = {}
+        self.log = None
+        self.journal = None
 
-        if not os.path.exists(self.log_file):
+        # "file" tails log_file, "journald" follows the systemd journal, "auto" prefers the file when it exists
+        source = config["ssh_monitor"].get("source", "auto")
+        if source == "auto":
+            source = "file" if os.path.exists(self.log_file) or not shutil.which("journalctl") else "journald"
+
+        if source == "journald":
+            cursor_file = os.path.join(config["log_directory"], config["ssh_monitor"].get("cursor_file", "journal_cursor.txt"))
+            os.makedirs(os.path.dirname(cursor_file), exist_ok=True)
+            self.journal = JournalAuthSource(cursor_file, prefilter=(b"Failed password",))
+            self.logger.info("Reading SSH login attempts from the systemd journal.")
+        elif not os.path.exists(self.log_file):
             self.logger.error(f"Log file {self.log_file} does not exist. Please ensure the path is correct.")
             raise FileNotFoundError(f"{self.log_file} not found.")
 
+    def process_line(self, line: str) -> None:
+        """
+        Record a failed login if the log line reports one.
+
+        Args:
+            line (str): A line from the authentication log.
+        """
+        match = self.fail_pattern.search(line)
+        if match:
+            user = match.group("user")
+            ip = match.group("ip")
+
+            now = time.monotonic()
+            if now - self.last_failure.get(ip, now) >= self.alert_expiry:
+                self.failures[ip] = 0
+            self.last_failure[ip] = now
+            self.failures[ip] += 1
+            self.logger.info(f"Failed SSH login attempt: User={user}, IP={ip}, Attempts={self.failures[ip]}")
+
+            if self.failures[ip] >= self.max_failures:
+                message = f"Multiple failed SSH login attempts detected: IP={ip}, Attempts={self.failures[ip]}"
+                # Act once per incident; further failures from the same IP are aggregated by the alert manager
+                if self.alerts.fire("ssh", ip, message, expire_after=self.alert_expiry):
+                    self.take_action(ip)
+
+    def run_check(self):
+        """
+        Process the lines appended to the log file (or journal entries) since the previous check.
+        The first check starts at the end of the file. After a rename rotation the rest of the old
+        file is read before the new one is opened from the start; a truncated (copytruncate) log is
+        reread from the start.
+        """
+        self.forget_quiet_ips()
+        if self.journal is not None:
+            for message in self.journal.read_messages():
+                self.process_line(message)
+            return
+
+        if self.log is None:
+            self.log = open(self.log_file, 'r')
+            self.log.seek(0, os.SEEK_END)
+        else:
+            try:
+                current = os.stat(self.log_file)
+            except FileNotFoundError:
+                current = None  # Rotated away and not recreated yet; keep reading the old file
+            if current is not None and current.st_ino != os.fstat(self.log.fileno()).st_ino:
+                while line := self.log.readline():
+                    self.process_line(line)
+                self.log.close()
+                self.log = open(self.log_file, 'r')
+            elif current is not None and current.st_size < self.log.tell():
+                self.log.seek(0)
+
+        while line := self.log.readline():
+            self.process_line(line)
+
+    def forget_quiet_ips(self) -> None:
+        """
+        Drop the failure counts of IPs that have not failed within alert_expiry.
+        """
+        cutoff = time.monotonic() - self.alert_expiry
+        for ip in [ip for ip, last in self.last_failure.items() if last <= cutoff]:
+            del self.last_failure[ip]
+            self.failures.pop(ip, None)
+
     def monitor_ssh_failures(self):
         """
         Continuously monitor the log file for failed SSH login attempts.
         """
         try:
-            with open(self.log_file, 'r') as log:
-                log.seek(0, os.SEEK_END)
-                while True:
-                    line = log.readline()
-                    if not line:
-                        time.sleep(self.check_interval)
-                        continue
-
-                    match = self.fail_pattern.search(line)
-                    if match:
-                        user = match.group("user")
-                        ip = match.group("ip")
-
-                        self.failures[ip] += 1
-                        self.logger.info(f"Failed SSH login attempt: User={user}, IP={ip}, Attempts={self.failures[ip]}")
-
-                        if self.failures[ip] >= self.max_failures:
-                            self.logger.warning(f"Multiple failed SSH login attempts detected: IP={ip}, Attempts={self.failures[ip]}")
-                            self.take_action(ip)
+            while True:
+                self.run_check()
+                time.sleep(self.check_interval)
         except Exception as e:
             self.logger.error(f"Error monitoring SSH logins: {str(e)}")
 
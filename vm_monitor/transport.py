@@ -0,0 +1,287 @@
+import os
+import shlex
+import shutil
+import tempfile
+import threading
+import subprocess
+import logging
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class CommandResult(NamedTuple):
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+
+
+class Transport(ABC):
+    """
+    Runs the commands a check needs on the host it inspects.
+    """
+
+    host = "localhost"
+    is_local = False
+
+    @abstractmethod
+    def run(self, argv: list[str], timeout: float | None = None) -> CommandResult:
+        """
+        Run a command and wait for it to finish.
+
+        Args:
+            argv (list[str]): The command and its arguments.
+            timeout (float): Seconds to wait before giving up.
+
+        Returns:
+            CommandResult: Exit status and captured output.
+        """
+
+    def reached_host(self, result: CommandResult) -> bool:
+        """
+        Whether a finished command actually ran on the host, as opposed to failing in the transport itself.
+        """
+        return True
+
+    def connect(self) -> None:
+        """
+        Establish any persistent connection the transport needs. No-op by default.
+        """
+
+    def close(self) -> None:
+        """
+        Release any persistent connection held by the transport. No-op by default.
+        """
+
+
+class SubprocessTransport(Transport):
+    """
+    A transport that executes a (possibly wrapped) command as a local subprocess.
+    """
+
+    def build_command(self, argv: list[str]) -> list[str]:
+        return list(argv)
+
+    def run(self, argv: list[str], timeout: float | None = None) -> CommandResult:
+        result = subprocess.run(self.build_command(argv), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+        return CommandResult(result.returncode, result.stdout, result.stderr)
+
+
+class LocalTransport(SubprocessTransport):
+    """
+    Runs commands on the machine the agent is running on.
+    """
+
+    is_local = True
+
+
+class SSHTransport(SubprocessTransport):
+    def __init__(self, host: str, user: str | None = None, port: int = 22, identity_file: str | None = None,
+                 control_dir: str | None = None, control_persist: int = 600, connect_timeout: int = 10):
+        """
+        Runs commands on a remote host over a multiplexed OpenSSH connection.
+        All commands share one master connection through a ControlPath socket.
+
+        Args:
+            host (str): Hostname or address of the remote machine.
+            user (str): Remote user name, defaults to the ssh configuration.
+            port (int): Remote SSH port.
+            identity_file (str): Private key to authenticate with.
+            control_dir (str): Directory holding the ControlPath sockets.
+            control_persist (int): Seconds the idle master connection is kept open.
+            connect_timeout (int): Seconds to wait for the TCP connection.
+        """
+        self.host = host
+        self.user = user
+        self.port = port
+        self.identity_file = identity_file
+        self.control_path = os.path.join(control_dir or tempfile.gettempdir(), "vm-monitor-%C")
+        self.control_persist = control_persist
+        self.connect_timeout = connect_timeout
+        self._connect_lock = threading.Lock()
+
+    def ssh_options(self) -> list[str]:
+        options = [
+            "-o", "BatchMode=yes",
+            "-o", f"ConnectTimeout={self.connect_timeout}",
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={self.control_path}",
+            "-o", f"ControlPersist={self.control_persist}",
+            "-p", str(self.port),
+        ]
+        if self.identity_file:
+            options += ["-i", self.identity_file]
+        if self.user:
+            options += ["-l", self.user]
+        return options
+
+    def build_command(self, argv: list[str]) -> list[str]:
+        # ssh joins remote arguments with spaces, so quote them for the remote shell
+        return ["ssh", *self.ssh_options(), self.host, "--", shlex.join(argv)]
+
+    def _control_command(self, operation: str) -> list[str]:
+        return ["ssh", *self.ssh_options(), "-O", operation, self.host]
+
+    def _master_command(self) -> list[str]:
+        return ["ssh", *self.ssh_options(), "-M", "-N", "-f", self.host]
+
+    def connect(self) -> None:
+        """
+        Start the master connection unless one is already running.
+        """
+        with self._connect_lock:
+            check = subprocess.run(self._control_command("check"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   timeout=self.connect_timeout)
+            if check.returncode != 0:
+                subprocess.run(self._master_command(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True,
+                               timeout=self.connect_timeout * 2)
+
+    def reached_host(self, result: CommandResult) -> bool:
+        # ssh reserves exit status 255 for its own errors, such as a failed connection
+        return result.returncode != 255
+
+    def close(self) -> None:
+        subprocess.run(self._control_command("exit"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class FakeHostTransport(Transport):
+    def __init__(self, host: str, responses: dict | None = None):
+        """
+        An in-process stand-in for a remote host, used for testing checks and the collector.
+
+        Args:
+            host (str): Name reported for the fake host.
+            responses (dict): Maps a command tuple to a CommandResult, a str/bytes stdout, or a callable returning either.
+        """
+        self.host = host
+        self.responses = dict(responses or {})
+        self.commands = []
+
+    def run(self, argv: list[str], timeout: float | None = None) -> CommandResult:
+        self.commands.append(tuple(argv))
+        response = self.responses.get(tuple(argv))
+        if callable(response):
+            response = response()
+        if response is None:
+            return CommandResult(127, b"", f"{argv[0]}: command not found".encode())
+        if isinstance(response, CommandResult):
+            return response
+        if isinstance(response, str):
+            response = response.encode()
+        return CommandResult(0, response, b"")
+
+
+class TrackedTransport(Transport):
+    def __init__(self, transport: Transport):
+        """
+        Wraps a transport and counts the commands that reached the host and those that did not,
+        because the checks log and swallow command errors.
+
+        Args:
+            transport (Transport): The transport to run commands through.
+        """
+        self.transport = transport
+        self.host = transport.host
+        self.is_local = transport.is_local
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def run(self, argv: list[str], timeout: float | None = None) -> CommandResult:
+        try:
+            result = self.transport.run(argv, timeout=timeout)
+        except Exception:
+            self.record(False)
+            raise
+        self.record(self.transport.reached_host(result))
+        return result
+
+    def record(self, reached: bool) -> None:
+        with self._lock:
+            if reached:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.completed = 0
+            self.failed = 0
+
+    def reached_host(self, result: CommandResult) -> bool:
+        return self.transport.reached_host(result)
+
+    def connect(self) -> None:
+        self.transport.connect()
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class SSHConnectionPool:
+    def __init__(self, config: dict):
+        """
+        Keeps one multiplexed SSHTransport per remote host.
+
+        Args:
+            config (dict): SSH settings shared by every host (user, port, identity_file, control_persist, control_dir).
+        """
+        self.logger = logger
+        self.config = config
+        self.control_dir = config.get("control_dir")
+        # A private socket directory is only created once the first host is used, and removed by close_all()
+        self.owns_control_dir = False
+        self.transports = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str | dict) -> SSHTransport:
+        """
+        Return the pooled transport for a host, creating it on first use.
+
+        Args:
+            host (str | dict): A hostname, or a dict with "host" and optional per-host "user"/"port"/"identity_file".
+
+        Returns:
+            SSHTransport: The transport for the host.
+        """
+        settings = dict(self.config)
+        if isinstance(host, dict):
+            settings.update(host)
+            host = host["host"]
+        with self._lock:
+            transport = self.transports.get(host)
+            if transport is None:
+                if self.control_dir is None:
+                    self.control_dir = tempfile.mkdtemp(prefix="vm-monitor-ssh-")
+                    self.owns_control_dir = True
+                transport = SSHTransport(
+                    host,
+                    user=settings.get("user"),
+                    port=settings.get("port", 22),
+                    identity_file=settings.get("identity_file"),
+                    control_dir=self.control_dir,
+                    control_persist=settings.get("control_persist", 600),
+                    connect_timeout=settings.get("connect_timeout", 10),
+                )
+                self.transports[host] = transport
+            return transport
+
+    def close_all(self) -> None:
+        """
+        Close every master connection held by the pool and remove its private socket directory.
+        """
+        with self._lock:
+            transports = list(self.transports.values())
+            self.transports.clear()
+            control_dir = self.control_dir if self.owns_control_dir else None
+            if control_dir is not None:
+                self.control_dir = None
+                self.owns_control_dir = False
+        for transport in transports:
+            try:
+                transport.close()
+            except Exception as e:
+                self.logger.error(f"Error closing SSH connection to {transport.host}: {str(e)}")
+        if control_dir is not None:
+            shutil.rmtree(control_dir, ignore_errors=True)
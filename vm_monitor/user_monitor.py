@@ -1,25 +1,33 @@
-import subprocess
 import os
 import time
-from log_utils import configure_logging
+import logging
+from transport import LocalTransport
+from log_utils import host_logger
+from snapshot_archive import open_archive
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 
 class UsersMonitor:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, transport=None):
         """
         Initialize the UsersMonitor class.
 
         Args:
             config (dict): Configuration dictionary for UsersMonitor settings.
+            transport (Transport): Where to run commands, defaults to the local machine.
         """
-        self.logger = logger
+        self.transport = transport or LocalTransport()
+        self.logger = host_logger(logger, self.transport)
         self.snapshot_file = os.path.join(config["log_directory"], config["users_monitor"]["snapshot_file"])
         self.check_interval = config["users_monitor"]["check_interval"]
+        self.command_timeout = config.get("command_timeout", 30)
 
         # Ensure the logs directory exists
         os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
 
+        # Optional history of every users snapshot, for point-in-time queries
+        self.archive = open_archive(config, "users", seed_file=self.snapshot_file)
+
         # Save the initial snapshot of users and permissions if it doesn't exist
         if not os.path.exists(self.snapshot_file):
             self.logger.info(f"No users snapshot found at {self.snapshot_file}. Saving initial snapshot.")
@@ -33,7 +41,7 @@ class UsersMonitor:
             str: The current users and their information as a string.
         """
         try:
-            result = subprocess.run(['getent', 'passwd'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            result = self.transport.run(['getent', 'passwd'], timeout=self.command_timeout)
             if result.returncode != 0:
                 self.logger.error(f"Error executing getent passwd: {result.stderr.decode('utf-8')}")
                 return None
@@ -51,6 +59,8 @@ class UsersMonitor:
             try:
                 with open(self.snapshot_file, 'w') as f:
                     f.write(users_info)
+                if self.archive is not None:
+                    self.archive.add(users_info)
                 self.logger.info(f"Saved initial users snapshot to {self.snapshot_file}.")
             except Exception as e:
                 self.logger.error(f"Error saving users snapshot to {self.snapshot_file}: {str(e)}")
@@ -90,16 +100,26 @@ class UsersMonitor:
             try:
                 with open(self.snapshot_file, 'w') as f:
                     f.write(current_users)
+                if self.archive is not None:
+                    self.archive.add(current_users)
                 self.logger.info(f"Updated users snapshot in {self.snapshot_file}.")
             except Exception as e:
                 self.logger.error(f"Error updating users snapshot in {self.snapshot_file}: {str(e)}")
 
+    def run_check(self) -> None:
+        """
+        Check users once and update the snapshot if they changed.
+        """
+        if self.compare_users():
+            self.logger.warning("Users or their permissions have changed. Updating snapshot.")
+            self.update_users_snapshot()
+        if self.archive is not None:
+            self.archive.maintain()
+
     def monitor_users(self) -> None:
         """
         Continuously monitor users for changes and log if any are detected.
         """
         while True:
-            if self.compare_users():
-                self.logger.warning("Users or their permissions have changed. Updating snapshot.")
-                self.update_users_snapshot()
+            self.run_check()
             time.sleep(self.check_interval)